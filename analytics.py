@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+RESULTS = ["Pass", "Fail", "Hold"]
+
+
+class AnalyticsData:
+    """Aggregates behind the Analytics page, built once per workbook version.
+
+    Completions per day are kept as sorted day keys plus a cumulative count
+    array, so a date range is answered by two binary searches and a slice
+    instead of a DataFrame rescan. Tester counts come from one bincount over
+    categorical codes; picking a tester is an array lookup.
+    """
+
+    def __init__(self, df):
+        self.total_tasks = df.shape[0]
+        results = df["Test Result"]
+        timestamps = df["Timestamp"] if "Timestamp" in df.columns else pd.Series(index=df.index, dtype=object)
+        self.completed_tasks = int(results.notna().sum())
+
+        counts = results.value_counts()
+        self.result_counts = pd.Series([int(counts.get(r, 0)) for r in RESULTS], index=RESULTS)
+
+        # Rows with either a Test Result or a Timestamp, as the dashboard always showed
+        active = results.notna() | timestamps.notna()
+
+        dates = pd.to_datetime(timestamps[active], errors="coerce").dropna()
+        self.days, per_day = np.unique(dates.values.astype("datetime64[D]"), return_counts=True)
+        self.cumulative = np.concatenate(([0], np.cumsum(per_day)))
+
+        # The tester chart counts the same dated rows as the timeline
+        dated = dates.index if "Timestamp" in df.columns else df.index[active]
+        testers = pd.Categorical(df.loc[dated, "Tester Name"].dropna())
+        self.testers = np.asarray(testers.categories, dtype=object)
+        self.tester_totals = np.bincount(testers.codes, minlength=len(self.testers))
+        self._tester_pos = {name: i for i, name in enumerate(self.testers)}
+        # value_counts() order: by count descending, ties in first-seen order
+        order = pd.Series(self.tester_totals, index=self.testers).reindex(pd.unique(np.asarray(testers, dtype=object)))
+        self._ranked = order.sort_values(ascending=False, kind="stable")
+
+    @property
+    def date_bounds(self):
+        """(first, last) completion day as datetime.date, or None without timestamps"""
+        if not len(self.days):
+            return None
+        return self.days[0].astype(object), self.days[-1].astype(object)
+
+    def _day_slice(self, start, end):
+        lo = np.searchsorted(self.days, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.days, np.datetime64(end, "D"), side="right")
+        return lo, hi
+
+    def daily_completions(self, start, end):
+        """DataFrame of Date / Tasks Completed for the days in [start, end] that have completions"""
+        lo, hi = self._day_slice(start, end)
+        return pd.DataFrame({
+            "Date": self.days[lo:hi].astype(object),
+            "Tasks Completed": np.diff(self.cumulative[lo:hi + 1]),
+        })
+
+    def tester_summary(self, tester="All"):
+        """DataFrame of Tester Name / Tasks Completed, for everyone or a single tester"""
+        if tester == "All":
+            return pd.DataFrame({"Tester Name": self._ranked.index, "Tasks Completed": self._ranked.values})
+        pos = self._tester_pos.get(tester)
+        if pos is None:
+            return pd.DataFrame({"Tester Name": [], "Tasks Completed": []})
+        return pd.DataFrame({"Tester Name": [tester], "Tasks Completed": [int(self.tester_totals[pos])]})
+
+    @property
+    def completion_percent(self):
+        return int((self.completed_tasks / self.total_tasks) * 100) if self.total_tasks > 0 else 0
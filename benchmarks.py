@@ -0,0 +1,331 @@
+"""Benchmarks for the workbook hot paths.
+
+Run with e.g. ``python benchmarks.py save --tasks 200 --images 2``, or
+``python benchmarks.py suite --sizes 1000 10000 50000 --images 2 --json out.json``
+for the end-to-end suite. Synthetic workbooks are written to a temporary
+directory and removed afterwards.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+import random
+import argparse
+import tempfile
+import statistics
+import openpyxl
+from PIL import Image
+from openpyxl.drawing.image import Image as OpenpyxlImage
+from workbook import LazyWorkbook
+
+HEADERS = ["Task ID", "Task Name", "Navigation", "Parameters", "Tester Name", "Test Result", "Timestamp"]
+TESTERS = ["Vaishnavi", "John", "Paul", "Anmol"]
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "PIL.Image", "matplotlib", "seaborn", "requests"]
+PAGES = ["Testing App", "Excel Sheet", "Analytics"]
+
+# Runs in a fresh interpreter, so every number includes cold imports
+_RENDER_PROBE = """
+import sys, json, time
+heavy = sys.argv[2:]
+loaded = lambda: [name for name in heavy if name in sys.modules]
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+result = {"streamlit": time.perf_counter() - start}
+start = time.perf_counter()
+at.run()
+result["first_render"] = time.perf_counter() - start
+result["first_render_modules"] = loaded()
+start = time.perf_counter()
+AppTest.from_file(sys.argv[1], default_timeout=600).run()
+result["next_session"] = time.perf_counter() - start
+result["pages"] = {}
+for page in %r[1:]:
+    start = time.perf_counter()
+    at.sidebar.radio[0].set_value(page).run()
+    result["pages"][page] = (time.perf_counter() - start, loaded())
+print(json.dumps(result))
+""" % PAGES
+
+
+def _noise_png(width, height, seed):
+    # Random pixels do not compress, so the workbook grows like one full of real screenshots
+    rng = random.Random(seed)
+    img = Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3))
+    bio = io.BytesIO()
+    img.save(bio, format="PNG")
+    bio.seek(0)
+    return bio
+
+
+def make_synthetic_workbook(path, tasks, images_per_task, image_size=(300, 200), subtasks=2):
+    """Write a workbook shaped like main_excel.xlsx with `tasks` parent tasks.
+
+    Written in write-only mode, so tens of thousands of rows and sheets fit in
+    memory. Parent tasks are done, spread over a month of timestamps.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    main_ws = wb.create_sheet("Sheet1")
+    main_ws.append(HEADERS)
+    for task in range(1, tasks + 1):
+        tester = TESTERS[task % len(TESTERS)]
+        for sub in range(subtasks + 1):
+            task_id = str(task) if sub == 0 else f"{task}.{sub}"
+            done = sub == 0
+            main_ws.append([
+                task_id, f"Task {task_id}", "Home > Page", "Username", tester,
+                "Pass" if done else None, f"2025-05-{task % 28 + 1:02d} 21:49:59" if done else None,
+            ])
+    if images_per_task:
+        for task in range(1, tasks + 1):
+            ws = wb.create_sheet(f"Task ID {task}")
+            ws.append(["Task", f"Task {task}"])
+            for i in range(images_per_task):
+                ws.add_image(OpenpyxlImage(_noise_png(*image_size, seed=task * 1000 + i)), f"A{2 + 15 * i}")
+                for _ in range(15):
+                    ws.append([])
+            ws.append(["Test Result", "Pass"])
+    wb.create_sheet("Summary").append(["Total Tasks"])
+    wb.save(path)
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_save(tasks, images, repeat):
+    """Single-task submission: full openpyxl load+save vs. incremental LazyWorkbook save"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        make_synthetic_workbook(path, tasks, images)
+        size_mb = os.path.getsize(path) / 1e6
+        target_sheet = f"Task ID {max(1, tasks // 2)}"
+
+        def submit(ws_main, ws_task):
+            ws_main.cell(row=3, column=6).value = "Fail"
+            ws_task.add_image(OpenpyxlImage(_noise_png(300, 200, seed=1)), f"A{ws_task.max_row + 2}")
+
+        def full_save():
+            wb = openpyxl.load_workbook(path)
+            submit(wb["Sheet1"], wb[target_sheet])
+            wb.save(io.BytesIO())
+
+        def incremental_save():
+            wb = LazyWorkbook(path)
+            wb.open_for_write([target_sheet, "Sheet1", "Summary"])
+            submit(wb["Sheet1"], wb[target_sheet])
+            wb.save(io.BytesIO())
+
+        full = _time(full_save, repeat)
+        incremental = _time(incremental_save, repeat)
+        print(f"workbook: {tasks} tasks x {images} screenshots ({size_mb:.1f} MB)")
+        print(f"  full load + wb.save     {full * 1000:9.1f} ms")
+        print(f"  incremental save        {incremental * 1000:9.1f} ms  ({full / incremental:.1f}x)")
+
+
+def _import_times(app_dir):
+    """{module: cumulative seconds} for `import main` in a fresh interpreter (-X importtime)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=app_dir, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative) / 1e6)
+    return times
+
+
+def _render_times(app_dir):
+    proc = subprocess.run([sys.executable, "-c", _RENDER_PROBE, os.path.join(app_dir, "main.py"), *HEAVY_MODULES],
+                          cwd=app_dir, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(tasks, images, repeat):
+    """Cold import time of main.py and time to first render of each page, in fresh processes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in os.listdir(APP_DIR):
+            if name.endswith(".py"):
+                shutil.copy(os.path.join(APP_DIR, name), tmp)
+        make_synthetic_workbook(os.path.join(tmp, "main_excel.xlsx"), tasks, images)
+        print(f"workbook: {tasks} tasks x {images} screenshots")
+
+        # The first start imports the workbook into the task store; later ones reuse it
+        first = _render_times(tmp)
+        restarts = [_render_times(tmp) for _ in range(repeat)]
+        imports = [_import_times(tmp) for _ in range(repeat)]
+
+        print("import main (fresh interpreter, task store warm)")
+        print(f"  total                   {statistics.median(t['main'] for t in imports) * 1000:9.1f} ms")
+        for name in ["streamlit", *HEAVY_MODULES]:
+            loaded = [t[name] for t in imports if name in t]
+            cost = f"{statistics.median(loaded) * 1000:9.1f} ms" if loaded else "  not imported"
+            print(f"    {name:<22}{cost}")
+
+        def median(key):
+            return statistics.median(run[key] for run in restarts) * 1000
+
+        print("time to first render (AppTest)")
+        print(f"  import streamlit        {median('streamlit'):9.1f} ms")
+        print(f"  first start             {first['first_render'] * 1000:9.1f} ms  (builds the task store)")
+        print(f"  restart                 {median('first_render'):9.1f} ms  "
+              f"loads: {', '.join(restarts[0]['first_render_modules']) or '-'}")
+        print(f"  next session            {median('next_session'):9.1f} ms  (same process)")
+        for page in PAGES[1:]:
+            seconds = statistics.median(run["pages"][page][0] for run in restarts) * 1000
+            print(f"  switch to {page:<14}{seconds:9.1f} ms  loads: {', '.join(restarts[0]['pages'][page][1])}")
+
+
+SUITE_SIZES = [1000, 10000, 50000]
+SUITE_TRANSPORTS = ["contents", "gitdata", "gitdata-split"]
+SUITE_SPANS = 15
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def bench_suite(sizes, images, repeat, json_path=None):
+    """Load, submit, save, analytics and GitHub sync latency at several workbook sizes.
+
+    A size is the number of Sheet1 rows: size / 10 tasks with 9 subtasks each,
+    every task sheet holding `images` screenshots. The engine pushes to a local
+    FakeGitHub server; its background compactor is held off so each stage is
+    timed on its own. After each size the busiest perf spans are listed.
+    """
+    import perf
+    from analytics import AnalyticsData
+    from fake_github import FakeGitHub
+    from github_client import GitHubClient
+    from github_sync import RemoteWorkbook
+    from image_store import ImageStore
+    from submissions import Submission, SubmissionEngine
+
+    results = {}
+    for size in sizes:
+        tasks = max(1, size // 10)
+        perf.reset()
+        row = results[size] = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "main_excel.xlsx")
+            start = time.perf_counter()
+            make_synthetic_workbook(path, tasks, images, image_size=(120, 80), subtasks=9)
+            row["generate"] = _ms(time.perf_counter() - start)
+            row["size_mb"] = round(os.path.getsize(path) / 1e6, 1)
+            print(f"workbook: {tasks * 10} tasks x {images} screenshots ({row['size_mb']:.1f} MB, "
+                  f"generated in {row['generate'] / 1000:.1f} s)")
+            with open(path, "rb") as f:
+                original = f.read()
+            store = ImageStore(os.path.join(tmp, "screenshots"))
+            screenshots = iter(store.put(_noise_png(640, 400, seed=i).getvalue()) for i in range(10 ** 6))
+            subtask = iter(f"{task}.{sub}" for sub in range(1, 10) for task in range(1, tasks + 1))
+
+            def submission():
+                return Submission(next(subtask), "Bench", "Pass", "benchmark", [next(screenshots)])
+
+            with FakeGitHub({"main_excel.xlsx": original}) as server:
+                client = GitHubClient("owner/repo", "token", api_url=server.url)
+                remote = RemoteWorkbook(client, "main_excel.xlsx")
+
+                def start_engine():
+                    return SubmissionEngine(path, remote, store=store, compact_delay=3600, compact_interval=3600,
+                                            batch_window=0)
+
+                start = time.perf_counter()
+                start_engine()
+                row["start_cold"] = _ms(time.perf_counter() - start)
+                start = time.perf_counter()
+                engine = start_engine()
+                row["start_warm"] = _ms(time.perf_counter() - start)
+                tasks_store = engine.tasks
+
+                row["load_sheet1"] = _ms(_time(lambda: LazyWorkbook(path).read_dataframe("Sheet1"), repeat))
+                row["tester_plan"] = _ms(_time(lambda: tasks_store.tester_plan(TESTERS[1]), repeat))
+                row["page_search"] = _ms(_time(lambda: tasks_store.page(search="Task 1", limit=50), repeat))
+
+                row["submit"] = _ms(_time(lambda: engine.submit(submission()), repeat))
+                engine.compact()
+                engine.worker.wait()
+
+                def submit_and_save():
+                    engine.submit(submission())
+                    start = time.perf_counter()
+                    engine.compact()
+                    return time.perf_counter() - start
+
+                row["save"] = _ms(statistics.median(submit_and_save() for _ in range(repeat)))
+                engine.worker.wait()
+                batch = [submission() for _ in range(50)]
+                row["submit_batch_50"] = _ms(_time(lambda: engine.submit_batch(batch), 1))
+                engine.worker.wait()
+
+                def sync():
+                    engine.submit(submission())
+                    engine.compact()
+                    engine.worker.wait()
+
+                row["submit_to_github"] = _ms(_time(sync, repeat))
+
+                row["analytics_build"] = _ms(_time(lambda: AnalyticsData(tasks_store.dataframe()), repeat))
+                tasks_store.derived("analytics", AnalyticsData)
+                row["analytics_cached"] = _ms(_time(lambda: tasks_store.derived("analytics", AnalyticsData), repeat))
+
+                with open(path, "rb") as f:
+                    data = f.read()
+                for transport in SUITE_TRANSPORTS:
+                    transport_remote = RemoteWorkbook(client, f"{transport}.xlsx", transport)
+                    # The first push of a transport creates its file; later ones update it
+                    version = [transport_remote.push(data, "benchmark", None)]
+
+                    def push():
+                        version[0] = transport_remote.push(data, "benchmark", version[0])
+
+                    row[f"push_{transport}"] = _ms(_time(push, repeat))
+
+        print(f"  {'stage':<24}{'ms':>10}")
+        for name, value in row.items():
+            if name not in ("generate", "size_mb"):
+                print(f"  {name:<24}{value:10.1f}")
+        spans = sorted(perf.stats().items(), key=lambda item: item[1]["total"], reverse=True)
+        row["spans"] = {name: {key: _ms(value) if key != "count" else value for key, value in entry.items()}
+                        for name, entry in spans}
+        print(f"  {'span':<32}{'calls':>7}{'mean ms':>10}{'max ms':>10}")
+        for name, entry in spans[:SUITE_SPANS]:
+            print(f"  {name:<32}{entry['count']:7d}{entry['mean'] * 1000:10.1f}{entry['max'] * 1000:10.1f}")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmark", choices=["save", "startup", "suite"])
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--images", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="Sheet1 rows per suite workbook")
+    parser.add_argument("--json", help="also write the suite results to this file")
+    args = parser.parse_args()
+    if args.benchmark == "save":
+        bench_save(args.tasks, args.images, args.repeat)
+    elif args.benchmark == "startup":
+        bench_startup(args.tasks, args.images, args.repeat)
+    elif args.benchmark == "suite":
+        bench_suite(args.sizes, args.images, args.repeat, args.json)
+
+
+if __name__ == "__main__":
+    main()
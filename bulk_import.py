@@ -0,0 +1,181 @@
+"""Record a whole run of test results at once, without the Streamlit form.
+
+    python bulk_import.py results.csv --screenshots shots/
+    python bulk_import.py results.jsonl --screenshots shots/ --repo owner/repo
+
+A results file is a CSV with a header row or JSONL with one object per line.
+Fields (headers are matched case-insensitively, spaces or underscores):
+Task ID, Tester Name, Test Result (Pass/Fail/Hold), and optionally Comment,
+Timestamp and Screenshots (file names in the screenshots folder, separated
+by ";" in CSV or a list in JSONL).
+
+The batch is applied in one pass: one open and save of the workbook, one
+Summary refresh and, with --repo, one GitHub commit. Inside the running app
+use SubmissionEngine.submit_batch() instead; from another process, go through
+GitHub (the app rebases its own submissions onto the new commit) rather than
+writing the app's local xlsx underneath it.
+"""
+import os
+import csv
+import json
+import argparse
+from datetime import datetime
+from github_client import GitHubClient, GitHubError, GITHUB_API_URL
+from github_sync import RemoteWorkbook, CONFLICT_STATUSES, TRANSPORTS
+from image_store import ImageStore, IMAGE_STORE_DIR
+from submissions import Submission, apply_submissions, TEST_RESULTS, TIMESTAMP_FORMAT
+from task_index import canonical_id
+from utils import write_local_workbook
+from workbook import LazyWorkbook, ensure_packed
+
+
+def _field(header):
+    return str(header).strip().lower().replace(" ", "_")
+
+
+def read_results(path):
+    """Rows of a CSV or JSONL results file as dicts with snake_case keys"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+    return [{_field(key): value for key, value in row.items()} for row in rows]
+
+
+def _screenshot_names(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(";") if name.strip()]
+    return list(value)
+
+
+def workbook_task_ids(excel_path):
+    """Canonical Task IDs of Sheet1"""
+    rows = LazyWorkbook(excel_path).read_rows("Sheet1", min_row=2, max_col=1)
+    return {canonical_id(row[0]) for row in rows if row[0] is not None}
+
+
+def validate_results(rows, task_ids, screenshots_dir=None):
+    """Check every row; a ValueError lists all the bad ones.
+
+    Timestamps are rewritten in place in the sheet's "%Y-%m-%d %H:%M:%S" form.
+    """
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        task_id = str(row.get("task_id") or "").strip()
+        if not task_id or canonical_id(task_id) not in task_ids:
+            errors.append(f"row {number}: unknown Task ID {task_id!r}")
+        if not str(row.get("tester_name") or "").strip():
+            errors.append(f"row {number}: missing Tester Name")
+        if row.get("test_result") not in TEST_RESULTS:
+            errors.append(f"row {number}: Test Result must be one of {', '.join(TEST_RESULTS)}")
+        if row.get("timestamp"):
+            try:
+                row["timestamp"] = datetime.strptime(str(row["timestamp"]).strip(), TIMESTAMP_FORMAT).strftime(TIMESTAMP_FORMAT)
+            except ValueError:
+                errors.append(f"row {number}: Timestamp {row['timestamp']!r} is not YYYY-MM-DD HH:MM:SS")
+        for name in _screenshot_names(row.get("screenshots")):
+            if not os.path.isfile(os.path.join(screenshots_dir or ".", name)):
+                errors.append(f"row {number}: screenshot {name!r} not found")
+    if errors:
+        raise ValueError("Invalid results:\n" + "\n".join(errors))
+
+
+def build_submissions(rows, task_ids, screenshots_dir=None, store=None):
+    """Validate result rows and turn them into Submissions with their screenshots stored"""
+    validate_results(rows, task_ids, screenshots_dir)
+    store = store or ImageStore()
+    submissions = []
+    for row in rows:
+        image_refs = []
+        for name in _screenshot_names(row.get("screenshots")):
+            with open(os.path.join(screenshots_dir or ".", name), "rb") as f:
+                image_refs.append(store.put(f.read()))
+        submissions.append(Submission(
+            task_id=str(row["task_id"]).strip(),
+            tester_name=str(row["tester_name"]).strip(),
+            test_result=row["test_result"],
+            comment=row.get("comment") or "",
+            image_refs=image_refs,
+            created=str(row["timestamp"]) if row.get("timestamp") else None,
+        ))
+    return submissions
+
+
+def import_results(results_path, excel_path, screenshots_dir=None, store=None, remote=None,
+                   message=None, max_attempts=5):
+    """Apply a results file to the workbook in one pass and return the submissions.
+
+    Without a remote, excel_path is updated in place. With a RemoteWorkbook the
+    branch's workbook is fetched into excel_path, the batch applied and the
+    result pushed as one commit; if the branch moves in between, the batch is
+    re-applied to the new workbook.
+    """
+    store = store or ImageStore()
+    rows = read_results(results_path)
+    message = message or f"Batch import of {len(rows)} results from {os.path.basename(results_path)}"
+    submissions = None
+    for attempt in range(max_attempts):
+        version = None
+        if remote is not None:
+            content, version = remote.fetch()
+            if content is not None:
+                write_local_workbook(excel_path, content)
+        ensure_packed(excel_path)
+        if submissions is None:
+            submissions = build_submissions(rows, workbook_task_ids(excel_path), screenshots_dir, store)
+        data = apply_submissions(excel_path, submissions, store)
+        if remote is not None:
+            try:
+                remote.push(data, message, version)
+            except GitHubError as e:
+                if e.status in CONFLICT_STATUSES and attempt < max_attempts - 1:
+                    continue
+                raise
+        write_local_workbook(excel_path, data)
+        return submissions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", help="CSV or JSONL results file")
+    parser.add_argument("--screenshots", help="folder the Screenshots file names are relative to")
+    parser.add_argument("--excel", default="main_excel.xlsx", help="local workbook (the working copy with --repo)")
+    parser.add_argument("--store", default=IMAGE_STORE_DIR, help="screenshot store directory")
+    parser.add_argument("--check", action="store_true", help="only validate the results file")
+    parser.add_argument("--repo", help="owner/name of the GitHub repository to commit the workbook to")
+    parser.add_argument("--file", help="workbook path in the repository (default: --excel's file name)")
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--transport", default="contents", choices=TRANSPORTS)
+    parser.add_argument("--token-env", default="GITHUB_TOKEN", help="environment variable holding the token")
+    parser.add_argument("--api-url", default=GITHUB_API_URL)
+    args = parser.parse_args()
+
+    remote = None
+    if args.repo:
+        token = os.environ.get(args.token_env)
+        if not token:
+            parser.error(f"--repo needs a GitHub token in ${args.token_env}")
+        client = GitHubClient(args.repo, token, branch=args.branch, api_url=args.api_url)
+        remote = RemoteWorkbook(client, args.file or os.path.basename(args.excel), args.transport)
+
+    try:
+        if args.check:
+            ensure_packed(args.excel)
+            rows = read_results(args.results)
+            validate_results(rows, workbook_task_ids(args.excel), args.screenshots)
+            print(f"{len(rows)} results OK")
+            return
+        submissions = import_results(args.results, args.excel, args.screenshots, ImageStore(args.store), remote)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    screenshots = sum(len(submission.image_refs) for submission in submissions)
+    target = f"{args.repo}:{remote.repo_file_path}" if remote else args.excel
+    print(f"Recorded {len(submissions)} results ({screenshots} screenshots) in {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import io
+import streamlit as st
+from perf import span
+
+RESULT_COLORS = ['#28a745', '#dc3545', '#ffc107']
+CHART_BACKENDS = {"Matplotlib": "matplotlib", "Vega": "vega"}
+CHART_CACHE_ENTRIES = 32
+
+
+def _export(fig, fmt):
+    """Serialize a figure and release it; Figure objects are never registered with pyplot"""
+    try:
+        bio = io.BytesIO()
+        fig.savefig(bio, format=fmt, bbox_inches="tight")
+        return bio.getvalue()
+    finally:
+        fig.clear()
+
+
+# The rendered bytes are cached on the (already filtered) data and the format,
+# so replaying a date range or tester selection skips matplotlib entirely.
+# matplotlib and seaborn are imported on first use, so pages without charts
+# never load them.
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def result_pie(result_counts, fmt="png"):
+    from matplotlib.figure import Figure
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(result_counts, labels=result_counts.index, autopct='%1.1f%%', startangle=90, colors=RESULT_COLORS)
+    ax.axis('equal')
+    return _export(fig, fmt)
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def completion_timeline(date_summary, fmt="png"):
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    sns.lineplot(data=date_summary, x="Date", y="Tasks Completed", marker="o", ax=ax)
+    ax.set_ylabel("Tasks")
+    ax.set_xlabel("Date")
+    ax.set_title("Tasks Completed Per Day")
+
+    # Format the x-axis
+    ax.set_xticks(date_summary["Date"])
+    ax.set_xticklabels(date_summary["Date"].astype(str), rotation=45, ha='right')
+    return _export(fig, fmt)
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def tester_bars(tester_summary, fmt="png"):
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(6, 3))  # Smaller size
+    ax = fig.subplots()
+    sns.barplot(data=tester_summary, x="Tester Name", y="Tasks Completed", hue="Tester Name",
+                palette="Blues_d", legend=False, ax=ax)
+    ax.set_xlabel("Tester", fontsize=10)
+    ax.set_ylabel("Task Count", fontsize=10)
+    ax.set_title("Tasks Completed Per Tester", fontsize=12)
+    ax.tick_params(axis='x', labelrotation=0, labelsize=8)
+    ax.tick_params(axis='y', labelsize=8)
+    fig.tight_layout()  # Adjust spacing to avoid cut-offs
+    return _export(fig, fmt)
+
+
+RENDERERS = {
+    "results": result_pie,
+    "timeline": completion_timeline,
+    "testers": tester_bars,
+}
+
+VEGA_SPECS = {
+    "results": {
+        "mark": {"type": "arc", "tooltip": True},
+        "encoding": {
+            "theta": {"field": "Count", "type": "quantitative"},
+            "color": {"field": "Test Result", "type": "nominal",
+                      "scale": {"domain": ["Pass", "Fail", "Hold"], "range": RESULT_COLORS}},
+        },
+    },
+    "timeline": {
+        "mark": {"type": "line", "point": True, "tooltip": True},
+        "encoding": {
+            "x": {"field": "Date", "type": "temporal", "title": "Date"},
+            "y": {"field": "Tasks Completed", "type": "quantitative", "title": "Tasks"},
+        },
+    },
+    "testers": {
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": "Tester Name", "type": "nominal", "title": "Tester", "sort": None},
+            "y": {"field": "Tasks Completed", "type": "quantitative", "title": "Task Count"},
+        },
+    },
+}
+
+
+def _vega_data(name, data):
+    import pandas as pd
+    if name == "results":
+        return pd.DataFrame({"Test Result": data.index, "Count": data.values})
+    if name == "timeline":
+        return data.assign(Date=pd.to_datetime(data["Date"]))
+    return data
+
+
+def show_chart(name, data, backend="matplotlib", fmt="png"):
+    """Draw one Analytics chart, as a cached matplotlib image or a native Vega-Lite chart"""
+    if backend == "vega":
+        st.vega_lite_chart(_vega_data(name, data), VEGA_SPECS[name], use_container_width=True)
+        return
+    with span(f"chart.{name}"):
+        image = RENDERERS[name](data, fmt)
+    st.image(image.decode() if fmt == "svg" else image)
@@ -0,0 +1,196 @@
+import io
+import csv
+import shutil
+import zipfile
+import posixpath
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image as OpenpyxlImage
+from openpyxl.styles import Font
+from section_index import BLOCK_LABELS
+from task_index import canonical_id
+from utils import task_sheet_name
+from workbook import sheet_images
+from perf import timed
+
+EXPORT_FORMATS = {"Excel (.xlsx)": "xlsx", "Zip of CSV + screenshots": "zip"}
+EXPORT_MIME = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "zip": "application/zip",
+}
+
+
+def _matches(record, tester_name, task_sheet, start, end):
+    if tester_name is not None and record.get("Tester Name") != tester_name:
+        return False
+    if task_sheet is not None and task_sheet_name(record["Task ID"]) != task_sheet:
+        return False
+    if start is not None or end is not None:
+        timestamp = record.get("Timestamp")
+        if timestamp is None:
+            return False
+        day = str(timestamp)[:10]
+        if (start is not None and day < start.isoformat()) or (end is not None and day > end.isoformat()):
+            return False
+    return True
+
+
+def _block_task_id(text):
+    return canonical_id(str(text)[len("Task "):]) if str(text).startswith("Task ") else None
+
+
+def _evidence_rows(ws, task_ids):
+    """Yield (source row, values, block text) of the evidence blocks of the given canonical Task IDs.
+
+    A block runs from its "Task"/"Subtask" label row to the row before the
+    next block, so its screenshots and later results are included.
+    """
+    current = None
+    for row_number, values in enumerate(ws.iter_rows(max_col=2, values_only=True), start=1):
+        label = values[0] if values else None
+        if label in BLOCK_LABELS:
+            current = values[1] if _block_task_id(values[1]) in task_ids else None
+        if current is not None:
+            yield row_number, values, current
+
+
+class _XlsxPackage:
+    """Write-only workbook: rows stream to temporary files, only the exported screenshots are held"""
+
+    def __init__(self, target):
+        self.target = target
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.ws = None
+        self.rows = 0
+
+    def start_sheet(self, title, headers=None):
+        self.ws = self.wb.create_sheet(title)
+        self.rows = 0
+        if headers:
+            self.append(headers, bold=True)
+
+    def append(self, values, bold=False):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(self.ws, value=value)
+            if bold and value is not None:
+                cell.font = Font(bold=True)
+            cells.append(cell)
+        self.ws.append(cells)
+        self.rows += 1
+        return self.rows
+
+    def evidence_row(self, source_row, values, block_text):
+        return self.append(values, bold=values[0] is not None)
+
+    def image(self, zf, media, row, block_text, index):
+        with zf.open(media) as f:
+            self.ws.add_image(OpenpyxlImage(io.BytesIO(f.read())), f"A{row}")
+
+    def close(self):
+        self.wb.save(self.target)
+
+
+class _ZipPackage:
+    """Zip of CSV files plus the original screenshot bytes, streamed member by member"""
+
+    def __init__(self, target):
+        self.zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        self.member = None
+        self.writer = None
+        self.sheet = None
+        self.rows = 0
+        self._images = []
+
+    def _close_member(self):
+        if self.member is not None:
+            self.member.close()
+            self.member = None
+        # A zip takes one write handle at a time, so screenshots follow their sheet's CSV
+        for zf, media, name in self._images:
+            with zf.open(media) as src, self.zip.open(name, "w") as dst:
+                shutil.copyfileobj(src, dst)
+        self._images = []
+
+    def start_sheet(self, title, headers=None):
+        self._close_member()
+        self.sheet = title
+        self.rows = 0
+        name = "results.csv" if headers else f"{title}/evidence.csv"
+        self.member = io.TextIOWrapper(self.zip.open(name, "w"), encoding="utf-8", newline="")
+        self.writer = csv.writer(self.member)
+        self.writer.writerow(headers or ["Row", "Field", "Value"])
+
+    def append(self, values, bold=False):
+        self.writer.writerow(["" if value is None else value for value in values])
+        self.rows += 1
+        return self.rows
+
+    def evidence_row(self, source_row, values, block_text):
+        if any(value is not None for value in values):
+            self.writer.writerow([source_row, *("" if value is None else value for value in values)])
+        return source_row
+
+    def image(self, zf, media, row, block_text, index):
+        name = f"{self.sheet}/{block_text}/{index:02d}{posixpath.splitext(media)[1]}"
+        self._images.append((zf, media, name))
+
+    def close(self):
+        self._close_member()
+        self.zip.close()
+
+
+@timed("export.package")
+def export_package(excel_path, target, fmt="xlsx", tester_name=None, task_sheet=None, start=None, end=None):
+    """Write the tasks matching the filters, with their evidence, to target (path or file object).
+
+    The package holds the matching Sheet1 rows and, for each "Task ID N"
+    sheet, only the evidence blocks of those tasks with their screenshots.
+    Sheets are streamed in read-only mode and written in write-only mode
+    (xlsx) or member by member (zip, which copies the screenshot bytes without
+    holding them), so memory does not grow with the size of the workbook.
+    start/end are dates compared with the Timestamp column. Returns the
+    number of tasks exported.
+    """
+    package = (_XlsxPackage if fmt == "xlsx" else _ZipPackage)(target)
+    # One handle for every read, so a concurrent compaction cannot mix two versions of the file
+    with open(excel_path, "rb") as f:
+        wb = openpyxl.load_workbook(f, read_only=True)
+        rows = wb["Sheet1"].iter_rows(values_only=True)
+        headers = [str(header) for header in next(rows, [])]
+        package.start_sheet("Sheet1", headers)
+        blocks = {}
+        exported = 0
+        for values in rows:
+            record = dict(zip(headers, values))
+            if record.get("Task ID") is None:
+                continue
+            if _matches(record, tester_name, task_sheet, start, end):
+                package.append(values)
+                blocks.setdefault(task_sheet_name(record["Task ID"]), set()).add(canonical_id(record["Task ID"]))
+                exported += 1
+
+        with zipfile.ZipFile(f) as zf:
+            for sheet_name in sorted(blocks, key=lambda name: (len(name), name)):
+                if sheet_name not in wb.sheetnames:
+                    continue
+                images = {}
+                for row, media in sheet_images(zf, sheet_name):
+                    images.setdefault(row, []).append(media)
+                package.start_sheet(sheet_name)
+                counts = {}
+                for row, values, block_text in _evidence_rows(wb[sheet_name], blocks[sheet_name]):
+                    new_row = package.evidence_row(row, values, block_text)
+                    for media in images.get(row, []):
+                        counts[block_text] = counts.get(block_text, 0) + 1
+                        package.image(zf, media, new_row, block_text, counts[block_text])
+            package.close()
+        wb.close()
+    return exported
+
+
+def export_bytes(excel_path, fmt="xlsx", **filters):
+    """export_package() into memory, returned as bytes (for st.download_button)"""
+    with io.BytesIO() as bio:
+        export_package(excel_path, bio, fmt, **filters)
+        return bio.getvalue()
@@ -0,0 +1,258 @@
+"""Local stand-in for the GitHub contents and Git Data APIs, for tests and benchmarks.
+
+    with FakeGitHub({"main_excel.xlsx": data}) as server:
+        client = GitHubClient("owner/repo", "token", api_url=server.url)
+        client.put_file("main_excel.xlsx", data, "msg")
+"""
+import json
+import time
+import base64
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from github_client import git_blob_sha
+
+
+class FakeGitHub:
+    """Threaded HTTP server backed by an in-memory object store, with injectable failures and latency.
+
+    Only one repository and branch are modelled; the owner/repo segments of
+    request paths are ignored.
+    """
+
+    def __init__(self, files=None, latency=0.0, branch="main"):
+        self.branch = branch
+        self.latency = latency
+        self.requests = []
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        self._failures = []
+        self._lock = threading.RLock()
+        tree = {path: self._store_blob(content) for path, content in (files or {}).items()}
+        self.refs[branch] = self._store_commit(self._store_tree(tree), [], "Initial commit")
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    # --- object store --------------------------------------------------------
+
+    def _store_blob(self, content):
+        sha = git_blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def _store_tree(self, entries):
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _store_commit(self, tree_sha, parents, message):
+        sha = hashlib.sha1(json.dumps([tree_sha, parents, message, len(self.commits)]).encode()).hexdigest()
+        self.commits[sha] = {"tree": tree_sha, "parents": parents, "message": message}
+        return sha
+
+    def _head_tree(self):
+        return self.trees[self.commits[self.refs[self.branch]]["tree"]]
+
+    @property
+    def files(self):
+        """Current branch contents as {path: bytes}"""
+        with self._lock:
+            return {path: self.blobs[sha] for path, sha in self._head_tree().items()}
+
+    @property
+    def commit_messages(self):
+        with self._lock:
+            messages = []
+            sha = self.refs[self.branch]
+            while self.commits[sha]["parents"]:
+                messages.append(self.commits[sha]["message"])
+                sha = self.commits[sha]["parents"][0]
+            return messages[::-1]
+
+    def set_file(self, path, content, message="External change"):
+        """Commit a change as if another client had pushed it"""
+        with self._lock:
+            tree = dict(self._head_tree())
+            tree[path] = self._store_blob(content)
+            self.refs[self.branch] = self._store_commit(self._store_tree(tree), [self.refs[self.branch]], message)
+
+    # --- server lifecycle ----------------------------------------------------
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, status, count=1, method=None):
+        """Answer the next `count` requests (optionally only of `method`) with `status`"""
+        with self._lock:
+            self._failures.extend([(status, method)] * count)
+
+    def _take_failure(self, method):
+        with self._lock:
+            for i, (status, only) in enumerate(self._failures):
+                if only is None or only == method:
+                    del self._failures[i]
+                    return status
+        return None
+
+    # --- request handling ----------------------------------------------------
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _dispatch(self, method):
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                server.requests.append((method, parsed.path))
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                failure = server._take_failure(method)
+                if failure is not None:
+                    return self._send(failure, {"message": "injected failure"})
+                parts = parsed.path.strip("/").split("/", 4)
+                if len(parts) == 5 and parts[0] == "repos":
+                    handler = getattr(self, f"_{parts[3]}_{method.lower()}", None)
+                    if handler is not None:
+                        with server._lock:
+                            return handler(parts[4], body)
+                self._send(404, {"message": "Not Found"})
+
+            # Contents API
+
+            def _contents_get(self, path, body):
+                sha = server._head_tree().get(path)
+                if sha is None:
+                    return self._send(404, {"message": "Not Found"})
+                content = server.blobs[sha]
+                self._send(200, {
+                    "path": path,
+                    "sha": sha,
+                    "size": len(content),
+                    "encoding": "base64",
+                    "content": base64.b64encode(content).decode(),
+                })
+
+            def _contents_put(self, path, body):
+                content = base64.b64decode(body["content"])
+                tree = dict(server._head_tree())
+                if path in tree and body.get("sha") != tree[path]:
+                    return self._send(409, {"message": f"{path} does not match {body.get('sha')}"})
+                created = path not in tree
+                tree[path] = server._store_blob(content)
+                head = server.refs[server.branch]
+                commit_sha = server._store_commit(server._store_tree(tree), [head], body.get("message"))
+                server.refs[server.branch] = commit_sha
+                self._send(201 if created else 200, {
+                    "content": {"path": path, "sha": tree[path], "size": len(content)},
+                    "commit": {"sha": commit_sha, "message": body.get("message")},
+                })
+
+            # Git Data API
+
+            def _git_get(self, path, body):
+                kind, _, name = path.partition("/")
+                if kind == "ref" and name.startswith("heads/") and name[6:] in server.refs:
+                    return self._send(200, {"ref": f"refs/{name}", "object": {"sha": server.refs[name[6:]], "type": "commit"}})
+                if kind == "commits" and name in server.commits:
+                    commit = server.commits[name]
+                    return self._send(200, {
+                        "sha": name,
+                        "tree": {"sha": commit["tree"]},
+                        "parents": [{"sha": p} for p in commit["parents"]],
+                        "message": commit["message"],
+                    })
+                if kind == "blobs" and name in server.blobs:
+                    content = server.blobs[name]
+                    return self._send(200, {
+                        "sha": name,
+                        "size": len(content),
+                        "encoding": "base64",
+                        "content": base64.b64encode(content).decode(),
+                    })
+                if kind == "trees" and name in server.trees:
+                    entries = [
+                        {"path": p, "mode": "100644", "type": "blob", "sha": s}
+                        for p, s in sorted(server.trees[name].items())
+                    ]
+                    return self._send(200, {"sha": name, "tree": entries, "truncated": False})
+                self._send(404, {"message": "Not Found"})
+
+            def _git_post(self, path, body):
+                if path == "blobs":
+                    content = body["content"]
+                    content = base64.b64decode(content) if body.get("encoding") == "base64" else content.encode()
+                    return self._send(201, {"sha": server._store_blob(content)})
+                if path == "trees":
+                    tree = dict(server.trees.get(body.get("base_tree"), {}))
+                    for entry in body["tree"]:
+                        if entry.get("sha", "") is None:
+                            tree.pop(entry["path"], None)
+                        elif "content" in entry:
+                            tree[entry["path"]] = server._store_blob(entry["content"].encode())
+                        elif entry["sha"] in server.blobs:
+                            tree[entry["path"]] = entry["sha"]
+                        else:
+                            return self._send(422, {"message": f"Unknown blob {entry['sha']}"})
+                    return self._send(201, {"sha": server._store_tree(tree)})
+                if path == "commits":
+                    if body["tree"] not in server.trees:
+                        return self._send(422, {"message": "Tree not found"})
+                    return self._send(201, {"sha": server._store_commit(body["tree"], body["parents"], body["message"])})
+                self._send(404, {"message": "Not Found"})
+
+            def _git_patch(self, path, body):
+                if not path.startswith("refs/heads/") or path[11:] not in server.refs:
+                    return self._send(404, {"message": "Not Found"})
+                branch = path[11:]
+                new_sha = body["sha"]
+                if new_sha not in server.commits:
+                    return self._send(422, {"message": "Object does not exist"})
+                if not body.get("force") and server.refs[branch] not in server.commits[new_sha]["parents"]:
+                    return self._send(422, {"message": "Update is not a fast forward"})
+                server.refs[branch] = new_sha
+                self._send(200, {"ref": f"refs/heads/{branch}", "object": {"sha": new_sha, "type": "commit"}})
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+        return Handler
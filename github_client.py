@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import threading
+import requests
+from perf import timed
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+def git_blob_sha(content):
+    """SHA git assigns to a blob with these bytes, computed locally"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GitHubError(Exception):
+    def __init__(self, status, text):
+        super().__init__(f"GitHub request failed: {status} {text}")
+        self.status = status
+
+
+class GitHubClient:
+    """GitHub client with a keep-alive session and a cache of the last known blob SHAs.
+
+    put_file() goes through the contents API. After a successful upload the
+    returned SHA is remembered, so the next upload of the same file skips the
+    GET. A 409/422 means the cached SHA went stale; it is dropped and the
+    caller's retry fetches a fresh one.
+
+    commit_files() goes through the Git Data API (blob/tree/commit/ref), which
+    has no contents API size limit and skips uploading any blob the branch
+    already holds.
+    """
+
+    def __init__(self, repo, github_token, branch="main", api_url=GITHUB_API_URL, timeout=60):
+        self.repo = repo
+        self.branch = branch
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {github_token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+        self._shas = {}
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    def _contents_url(self, repo_file_path):
+        return f"{self.api_url}/repos/{self.repo}/contents/{repo_file_path}"
+
+    def get_sha(self, repo_file_path, refresh=False):
+        """Blob SHA of a file on the branch, from the cache unless refresh is set"""
+        with self._lock:
+            sha = None if refresh else self._shas.get(repo_file_path)
+        if sha is not None:
+            return sha
+        response = self.session.get(
+            self._contents_url(repo_file_path), params={"ref": self.branch}, timeout=self.timeout
+        )
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise GitHubError(response.status_code, response.text)
+        sha = response.json()["sha"]
+        with self._lock:
+            self._shas[repo_file_path] = sha
+        return sha
+
+    @timed("github.get_file")
+    def get_file(self, repo_file_path):
+        """(bytes, blob SHA) of a file on the branch, or (None, None) if it does not exist"""
+        response = self.session.get(
+            self._contents_url(repo_file_path), params={"ref": self.branch}, timeout=self.timeout
+        )
+        if response.status_code == 404:
+            return None, None
+        if response.status_code != 200:
+            raise GitHubError(response.status_code, response.text)
+        result = response.json()
+        # Files over 1 MB come back without inline content; fetch the blob instead
+        if result.get("encoding") == "base64" and result.get("content"):
+            content = base64.b64decode(result["content"])
+        else:
+            content = self.get_blob(result["sha"])
+        with self._lock:
+            self._shas[repo_file_path] = result["sha"]
+        return content, result["sha"]
+
+    @timed("github.put_file")
+    def put_file(self, repo_file_path, content, message, base_sha=None):
+        """Upload in-memory bytes as the new version of a file.
+
+        With base_sha the upload only succeeds if the branch still holds that
+        version (GitHub answers 409 otherwise); without it the last known SHA
+        is used.
+        """
+        data = {
+            "message": message,
+            "content": base64.b64encode(content).decode(),
+            "branch": self.branch
+        }
+        sha = base_sha if base_sha is not None else self.get_sha(repo_file_path)
+        if sha is not None:
+            data["sha"] = sha
+        response = self.session.put(self._contents_url(repo_file_path), json=data, timeout=self.timeout)
+        if response.status_code not in (200, 201):
+            if response.status_code in (409, 422):
+                self.forget_sha(repo_file_path)
+            raise GitHubError(response.status_code, response.text)
+        result = response.json()
+        with self._lock:
+            self._shas[repo_file_path] = result["content"]["sha"]
+        return result
+
+    def forget_sha(self, repo_file_path):
+        with self._lock:
+            self._shas.pop(repo_file_path, None)
+
+    # --- Git Data API ---------------------------------------------------------
+
+    def _git(self, method, path, **kwargs):
+        response = self.session.request(
+            method, f"{self.api_url}/repos/{self.repo}/git/{path}", timeout=self.timeout, **kwargs
+        )
+        if response.status_code not in (200, 201):
+            raise GitHubError(response.status_code, response.text)
+        return response.json()
+
+    def _tree_entries(self, tree_sha):
+        """{path: blob sha} for a tree, cached since trees are immutable"""
+        entries = self._trees.get(tree_sha)
+        if entries is None:
+            tree = self._git("GET", f"trees/{tree_sha}", params={"recursive": "1"})
+            entries = {e["path"]: e["sha"] for e in tree["tree"] if e["type"] == "blob"}
+            self._trees = {tree_sha: entries}
+        return entries
+
+    def get_blob(self, sha):
+        blob = self._git("GET", f"blobs/{sha}")
+        return base64.b64decode(blob["content"])
+
+    def head_entries(self):
+        """(head commit SHA, tree SHA, {path: blob sha}) of the branch"""
+        head = self._git("GET", f"ref/heads/{self.branch}")["object"]["sha"]
+        base_tree = self._git("GET", f"commits/{head}")["tree"]["sha"]
+        return head, base_tree, self._tree_entries(base_tree)
+
+    def create_blob(self, content):
+        return self._git("POST", "blobs", json={
+            "content": base64.b64encode(content).decode(),
+            "encoding": "base64"
+        })["sha"]
+
+    @timed("github.commit_files")
+    def commit_files(self, changes, message, prune_prefix=None, check=None):
+        """Commit {path: bytes, or None to delete} on top of the branch head.
+
+        Files under prune_prefix that are not in changes are deleted. Returns the
+        new commit SHA, or None when nothing changed. A 422 from the ref update
+        means someone else pushed first; retrying rebuilds on the new head.
+        check(remote entries) can veto the commit by returning False, which
+        raises a 409 as the contents API does for a stale SHA.
+        """
+        head, base_tree, remote = self.head_entries()
+        if check is not None and not check(remote):
+            raise GitHubError(409, "Branch content changed since it was last fetched")
+        known = set(remote.values())
+
+        if prune_prefix:
+            stale = [p for p in remote if p.startswith(prune_prefix) and p not in changes]
+            changes = {**changes, **dict.fromkeys(stale)}
+
+        entries = []
+        for path, content in changes.items():
+            if content is None:
+                if path in remote:
+                    entries.append({"path": path, "mode": "100644", "type": "blob", "sha": None})
+                continue
+            sha = git_blob_sha(content)
+            if remote.get(path) == sha:
+                continue
+            if sha not in known:
+                sha = self.create_blob(content)
+                known.add(sha)
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": sha})
+        if not entries:
+            return None
+
+        tree = self._git("POST", "trees", json={"base_tree": base_tree, "tree": entries})["sha"]
+        commit = self._git("POST", "commits", json={"message": message, "tree": tree, "parents": [head]})["sha"]
+        self._git("PATCH", f"refs/heads/{self.branch}", json={"sha": commit, "force": False})
+        with self._lock:
+            # Contents-API SHAs of the committed paths are now known too
+            for entry in entries:
+                if entry["sha"] is None:
+                    self._shas.pop(entry["path"], None)
+                else:
+                    self._shas[entry["path"]] = entry["sha"]
+        return commit
@@ -0,0 +1,201 @@
+import io
+import json
+import time
+import queue
+import hashlib
+import random
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import requests
+from github_client import GitHubError, git_blob_sha
+from workbook import PARTS_SUFFIX, explode_package, pack_package
+from perf import timed
+
+RETRYABLE_STATUSES = {409, 422, 429, 500, 502, 503, 504}
+CONFLICT_STATUSES = {409, 422}
+TRANSPORTS = ("contents", "gitdata", "gitdata-split")
+
+
+class SyncWorker:
+    """Background thread that pushes workbook snapshots to GitHub.
+
+    Each snapshot is the whole workbook, so a burst of submissions collapses
+    into a single commit of the newest one. Conflicts (409/422) and transient
+    errors (429/5xx) are retried with exponential backoff. When a rebase
+    callable is given it runs after every conflict, before the retry, so the
+    retried upload is built on the branch's new content instead of
+    overwriting it.
+    """
+
+    def __init__(self, upload, batch_window=2.0, max_retries=5, backoff=1.0, rebase=None):
+        self.upload = upload
+        self.rebase = rebase
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._status = {
+            "state": "idle",
+            "pending": 0,
+            "commits": 0,
+            "last_synced": None,
+            "last_error": None,
+        }
+        self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+        self._thread.start()
+
+    def submit(self, content, message):
+        """Queue a workbook snapshot for upload and return immediately"""
+        with self._lock:
+            self._status["pending"] += 1
+            if self._status["state"] in ("idle", "error"):
+                self._status["state"] = "pending"
+        self._queue.put((content, message))
+
+    def status(self):
+        with self._lock:
+            return dict(self._status)
+
+    def wait(self, timeout=None):
+        """Block until every queued snapshot has been handled (for scripts and benchmarks)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.status()["pending"]:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            content = batch[-1][0]
+            messages = list(dict.fromkeys(message for _, message in batch))
+            message = messages[0] if len(messages) == 1 else f"{len(messages)} updates: " + "; ".join(messages)
+            self._set_status(state="syncing")
+            try:
+                self._upload_with_retry(content, message)
+            except Exception as e:
+                self._set_status(state="error", last_error=str(e), pending_done=len(batch))
+            else:
+                self._set_status(
+                    state="idle",
+                    last_error=None,
+                    last_synced=datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S"),
+                    pending_done=len(batch),
+                    committed=True,
+                )
+
+    def _upload_with_retry(self, content, message):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.upload(content, message)
+            except (GitHubError, requests.ConnectionError, requests.Timeout) as e:
+                status = getattr(e, "status", None)
+                if attempt == self.max_retries or (status is not None and status not in RETRYABLE_STATUSES):
+                    raise
+                if self.rebase is not None and status in CONFLICT_STATUSES:
+                    self.rebase()
+                delay = self.backoff * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+    def _set_status(self, pending_done=0, committed=False, **fields):
+        with self._lock:
+            self._status.update(fields)
+            self._status["pending"] -= pending_done
+            if committed:
+                self._status["commits"] += 1
+            if self._status["pending"] and self._status["state"] == "idle":
+                self._status["state"] = "pending"
+
+
+class RemoteWorkbook:
+    """The workbook on the branch, read and written with optimistic locking.
+
+    A version identifies one state of the remote workbook: the blob SHA of the
+    xlsx, or for "gitdata-split" a digest of the blob SHAs of its parts.
+    push() takes the version its content was built on and fails with a 409
+    when the branch holds a different one, so a concurrent change is never
+    overwritten.
+
+    transport is one of:
+      "contents"      PUT the whole file through the contents API
+      "gitdata"       commit the whole file as one blob through the Git Data API
+      "gitdata-split" commit every zip member as its own file under
+                      `<repo_file_path>.parts/`, so screenshots that did not
+                      change are never uploaded again (the app rebuilds the
+                      xlsx from that directory on load)
+    """
+
+    def __init__(self, client, repo_file_path, transport="contents"):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown GitHub transport {transport!r}")
+        self.client = client
+        self.repo_file_path = repo_file_path
+        self.transport = transport
+        self.parts_dir = repo_file_path + PARTS_SUFFIX + "/"
+
+    def _parts_version(self, parts):
+        return "parts:" + hashlib.sha1(json.dumps(sorted(parts.items())).encode()).hexdigest()
+
+    def _remote_version(self, entries):
+        parts = {path: sha for path, sha in entries.items() if path.startswith(self.parts_dir)}
+        if self.transport == "gitdata-split" and parts:
+            return self._parts_version(parts)
+        return entries.get(self.repo_file_path)
+
+    def version_of(self, content):
+        """Version the branch would have if it held exactly these workbook bytes"""
+        if self.transport == "gitdata-split":
+            return self._parts_version({
+                self.parts_dir + name: git_blob_sha(data) for name, data in explode_package(content).items()
+            })
+        return git_blob_sha(content)
+
+    @timed("github.fetch")
+    def fetch(self):
+        """(workbook bytes, version) currently on the branch; (None, None) if it has none"""
+        if self.transport == "contents":
+            return self.client.get_file(self.repo_file_path)
+        _, _, entries = self.client.head_entries()
+        version = self._remote_version(entries)
+        if version is None:
+            return None, None
+        if not version.startswith("parts:"):
+            return self.client.get_blob(version), version
+        members = {
+            path[len(self.parts_dir):]: self.client.get_blob(sha)
+            for path, sha in entries.items() if path.startswith(self.parts_dir)
+        }
+        bio = io.BytesIO()
+        pack_package(members, bio)
+        return bio.getvalue(), version
+
+    @timed("github.push")
+    def push(self, content, message, base_version):
+        """Commit content if the branch is still at base_version; returns the new version"""
+        if self.transport == "contents":
+            self.client.put_file(self.repo_file_path, content, message, base_sha=base_version)
+            return git_blob_sha(content)
+        check = lambda entries: self._remote_version(entries) == base_version
+        if self.transport == "gitdata":
+            self.client.commit_files({self.repo_file_path: content}, message, check=check)
+        else:
+            changes = {self.parts_dir + name: data for name, data in explode_package(content).items()}
+            changes[self.repo_file_path] = None
+            self.client.commit_files(changes, message, prune_prefix=self.parts_dir, check=check)
+        return self.version_of(content)
@@ -0,0 +1,123 @@
+import io
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from perf import timed
+
+IMAGE_STORE_DIR = ".screenshot_store"
+THUMBNAIL_SIZE = (600, 400)
+PNG_MODES = {"1", "L", "LA", "I", "P", "RGB", "RGBA"}
+
+
+def _read_upload(upload):
+    """Bytes of an uploaded file, BytesIO or raw bytes"""
+    if isinstance(upload, bytes):
+        return upload
+    if hasattr(upload, "getvalue"):
+        return upload.getvalue()
+    upload.seek(0)
+    return upload.read()
+
+
+def render_thumbnail(source, size=THUMBNAIL_SIZE, fast=True):
+    """Decode an image, fit it into size and return PNG bytes.
+
+    With fast set, JPEGs are decoded straight at (at least) the target scale
+    via draft mode and resized with bilinear rather than bicubic filtering.
+    """
+    from PIL import Image  # only needed once a screenshot is submitted
+    img = Image.open(source)
+    if fast:
+        img.draft("RGB", size)
+    img.thumbnail(size, resample=Image.Resampling.BILINEAR if fast else Image.Resampling.BICUBIC)
+    if img.mode not in PNG_MODES:
+        img = img.convert("RGB")
+    bio = io.BytesIO()
+    img.save(bio, format="PNG")
+    return bio.getvalue()
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ImageStore:
+    """Content-addressed screenshot store.
+
+    Originals live under originals/<sha256> and rendered thumbnails under
+    thumbs/<sha256>_<w>x<h>.png, so a screenshot uploaded for several subtasks
+    is stored, decoded and resized only once. Identical thumbnail bytes also
+    let the workbook writer embed the image a single time.
+    """
+
+    def __init__(self, root=IMAGE_STORE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "originals"), exist_ok=True)
+        os.makedirs(os.path.join(root, "thumbs"), exist_ok=True)
+
+    def _original_path(self, digest):
+        return os.path.join(self.root, "originals", digest)
+
+    def _thumbnail_path(self, digest, size):
+        return os.path.join(self.root, "thumbs", f"{digest}_{size[0]}x{size[1]}.png")
+
+    def put(self, upload):
+        """Store an upload (if new) and return its content hash"""
+        data = _read_upload(upload)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._original_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        return digest
+
+    def has(self, digest):
+        return os.path.exists(self._original_path(digest))
+
+    def original(self, digest):
+        with open(self._original_path(digest), "rb") as f:
+            return f.read()
+
+    def thumbnail(self, digest, size=THUMBNAIL_SIZE):
+        """PNG bytes of the image fitted into size, rendered on first request"""
+        path = self._thumbnail_path(digest, size)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        data = render_thumbnail(self._original_path(digest), size)
+        _write_atomic(path, data)
+        return data
+
+    @timed("images.thumbnails")
+    def thumbnails(self, uploads, size=THUMBNAIL_SIZE, max_workers=None):
+        """Store and thumbnail a batch of uploads in a thread pool; results keep upload order.
+
+        Pillow releases the GIL while decoding, resizing and encoding, so
+        threads scale across cores without pickling images between processes.
+        """
+        uploads = list(uploads)
+        if len(uploads) <= 1:
+            return [self.thumbnail(self.put(upload), size) for upload in uploads]
+        with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as pool:
+            digests = list(pool.map(self.put, uploads))
+            unique = list(dict.fromkeys(digests))
+            rendered = dict(zip(unique, pool.map(lambda digest: self.thumbnail(digest, size), unique)))
+        return [rendered[digest] for digest in digests]
+
+    @timed("images.prerender")
+    def prerender(self, digests, size=THUMBNAIL_SIZE, max_workers=None):
+        """Render missing thumbnails of stored images in a thread pool, so later thumbnail() calls only read them"""
+        missing = [digest for digest in dict.fromkeys(digests) if not os.path.exists(self._thumbnail_path(digest, size))]
+        if len(missing) <= 1:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1)) as pool:
+            list(pool.map(lambda digest: self.thumbnail(digest, size), missing))
+
+
+@st.cache_resource
+def get_image_store(root=IMAGE_STORE_DIR):
+    return ImageStore(root)
@@ -0,0 +1,96 @@
+import os
+import json
+import uuid
+import threading
+from openpyxl.packaging.custom import StringProperty
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+QUARANTINE_SUFFIX = ".quarantine.jsonl"
+JOURNAL_PROPERTY_PREFIX = "journal:"
+
+
+class ResultsJournal:
+    """Append-only JSONL log of submissions, the write path of every submit.
+
+    The first line names the journal with a random id; every later line is one
+    submission. Entries are addressed by byte offset, and a workbook records in
+    the custom property "journal:<id>" the offset up to which it already
+    contains this journal. Compaction and rebases use that to apply each entry
+    exactly once. A workbook without the property contains none of it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._append_line({"journal": uuid.uuid4().hex})
+        with open(path, "rb") as f:
+            header = f.readline()
+        self.journal_id = json.loads(header)["journal"]
+        self.start = len(header)
+
+    @property
+    def property_name(self):
+        return f"{JOURNAL_PROPERTY_PREFIX}{self.journal_id}"
+
+    def _append_line(self, *entries):
+        lines = b"".join((json.dumps(entry, separators=(",", ":")) + "\n").encode() for entry in entries)
+        with open(self.path, "ab") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def append(self, entry):
+        """Durably append one entry and return the journal's end offset after it"""
+        with self._lock:
+            return self._append_line(entry)
+
+    def extend(self, entries):
+        """Durably append several entries with a single write and fsync; returns the end offset"""
+        with self._lock:
+            return self._append_line(*entries)
+
+    def read(self, offset=None, end=None):
+        """[(entry, offset just past it)] from offset up to end, skipping a torn last line"""
+        offset = max(offset or 0, self.start)
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read() if end is None else f.read(max(end - offset, 0))
+        entries = []
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            entries.append((json.loads(line), offset))
+        return entries
+
+    @property
+    def quarantine_path(self):
+        return self.path + QUARANTINE_SUFFIX
+
+    def quarantine(self, entry, offset, error):
+        """Set aside an entry that cannot be applied; compaction and rebases skip it from then on"""
+        with self._lock:
+            with open(self.quarantine_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"offset": offset, "error": error, "entry": entry}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def quarantined(self):
+        """[{"offset", "error", "entry"}] of the quarantined entries, oldest first"""
+        if not os.path.exists(self.quarantine_path):
+            return []
+        with open(self.quarantine_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+
+    def offset_in(self, props):
+        """Journal offset recorded in a workbook's custom properties, or None"""
+        if self.property_name not in props.names:
+            return None
+        return int(props[self.property_name].value)
+
+    def mark(self, props, offset):
+        """Record in a workbook's custom properties that it contains the journal up to offset"""
+        props.props = [prop for prop in props.props if prop.name != self.property_name]
+        props.append(StringProperty(name=self.property_name, value=str(offset)))
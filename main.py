@@ -1,21 +1,14 @@
+import time
 import streamlit as st
 st.set_page_config(page_title="Testing Tool", layout="wide")
-import pandas as pd
-from utils import load_excel_data, save_screenshots_to_excel
-from PIL import Image
-import io
-import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-import time
+import perf
+from task_index import canonical_id, COMPLETED, AVAILABLE, LOCKED
+from image_store import get_image_store
+from charts import show_chart, CHART_BACKENDS
+from export import EXPORT_FORMATS, EXPORT_MIME, export_bytes
+from utils import task_sheet_name
 
-# Replace the GitHub import with this try-except block
-try:
-    from github import Github  # For GitHub integration
-    GITHUB_ENABLED = True
-except ImportError:
-    GITHUB_ENABLED = False
-    st.warning("PyGithub not installed - GitHub updates disabled", icon="⚠️")
+from submissions import Submission, get_submission_engine
 
 # Page setup with custom theme (MUST BE FIRST STREAMLIT COMMAND)
 
@@ -35,33 +28,62 @@ st.markdown("""
 GITHUB_REPO = "Anvaishxx0/Testing-Documentation"
 GITHUB_FILE = "main_excel.xlsx"
 
-# Load Excel data
 MAIN_EXCEL_PATH = "main_excel.xlsx"
-df_main, wb = load_excel_data(MAIN_EXCEL_PATH)
+LIVE_REFRESH_SECONDS = 2
 
-# Clean and normalize Task IDs
-df_main["Task ID"] = df_main["Task ID"].astype(str).str.strip()
+def submission_engine():
+    """Process-wide submission engine; it only syncs to GitHub when a token is configured"""
+    try:
+        token = st.secrets["GITHUB_TOKEN"]
+    except (KeyError, FileNotFoundError):
+        return get_submission_engine(MAIN_EXCEL_PATH)
+    transport = st.secrets.get("GITHUB_TRANSPORT", "contents")
+    return get_submission_engine(MAIN_EXCEL_PATH, GITHUB_REPO, GITHUB_FILE, token, transport=transport)
 
-# Sidebar navigation
+# Sidebar navigation (rendered before the engine is built, so a cold start shows it at once)
 st.sidebar.title("💡 Navigation")
 page = st.sidebar.radio("Go to", ["Testing App", "Excel Sheet", "Analytics"])
-
-# Improved ID normalization function
-def normalize_id(task_id):
-    """Convert all task IDs to consistent string format"""
-    try:
-        # Handle string inputs
-        if isinstance(task_id, str):
-            if '.' in task_id:
-                return task_id  # Keep decimal IDs as-is (2.0, 2.1 etc.)
-            return str(int(float(task_id)))  # Convert "2" to "2"
-       
-        # Handle numeric inputs
-        if float(task_id).is_integer():
-            return str(int(task_id))  # Convert 2.0 to "2"
-        return str(task_id)  # Keep 2.1 as "2.1"
-    except:
-        return str(task_id)  # Fallback for any format
+page_started = time.perf_counter()
+
+# Task data is read from the engine's indexed task store, which is imported from
+# the xlsx only when the file changes and sees every submit immediately
+engine = submission_engine()
+task_store = engine.tasks
+
+# Every session reads the one shared store and subscribes to its changes; this
+# run reads the current version, so only later changes trigger a refresh
+if "task_store_changes" not in st.session_state:
+    st.session_state["task_store_changes"] = task_store.subscribe()
+task_store_changes = st.session_state["task_store_changes"]
+task_store_changes.clear()
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watch_task_store():
+    """Rerun the page once a submit from any session (or a GitHub rebase) changes the tasks"""
+    if task_store_changes.is_set():
+        st.rerun()
+
+
+watch_task_store()
+
+if engine.compact_error:
+    st.sidebar.warning(f"⚠️ Writing results to Excel failed: {engine.compact_error}")
+quarantined = engine.quarantined()
+if quarantined:
+    st.sidebar.warning(f"⚠️ {len(quarantined)} result(s) could not be written to Excel and were set aside "
+                       f"in {engine.journal.quarantine_path}: {quarantined[-1]['error']}")
+
+# GitHub sync status (the upload itself runs in the background)
+worker = engine.worker
+if worker is not None:
+    sync_status = worker.status()
+    if sync_status["state"] == "error":
+        st.sidebar.warning(f"⚠️ GitHub sync failed: {sync_status['last_error']}")
+    elif sync_status["pending"]:
+        st.sidebar.info(f"🔄 Syncing {sync_status['pending']} update(s) to GitHub...")
+    elif sync_status["last_synced"]:
+        st.sidebar.caption(f"✅ Synced to GitHub at {sync_status['last_synced']}")
 
 # Graph plotting function (unchanged)
 def plot_test_result_summary(df):
@@ -72,60 +94,44 @@ def plot_test_result_summary(df):
         st.warning("No test results available to display.")
         return
 
-    fig, ax = plt.subplots()
-    colors = ['#28a745', '#dc3545', '#ffc107']
-    ax.pie(result_counts, labels=result_counts.index, autopct='%1.1f%%', startangle=90, colors=colors)
-    ax.axis('equal')
     st.markdown("### 📊 Test Result Summary")
-    st.pyplot(fig)
+    show_chart("results", result_counts)
 
 if page == "Testing App":
     st.title("🔍 Testing Documentation Tool")
 
+    # Task lookups are indexed queries against the task store
+    task_index = task_store
+
     # Tester Selection
-    tester_names = sorted(df_main["Tester Name"].dropna().unique())
+    tester_names = task_index.testers()
     tester_name = st.selectbox("👤 Select Tester Name", tester_names)
 
-    # Filter and prepare tasks
-    tester_tasks = df_main[df_main["Tester Name"] == tester_name].copy()
-    tester_tasks["Normalized_ID"] = tester_tasks["Task ID"].apply(normalize_id)
-   
-   
-
-    # Determine completed tasks
-    completed_ids = df_main[df_main["Test Result"].notna()]["Task ID"].apply(normalize_id).tolist()
-
     # Prepare task availability
-    available_task_ids = []
-    disabled_task_ids = []
-    sorted_task_ids = tester_tasks.sort_values("Task ID")["Task ID"].unique()
-
-    for i, tid in enumerate(sorted_task_ids):
-        norm_tid = normalize_id(tid)
-        if norm_tid in completed_ids:
-            disabled_task_ids.append(tid)
-        elif i == 0 or normalize_id(sorted_task_ids[i-1]) in completed_ids:
-            available_task_ids.append(tid)
+    tester_plan = task_index.tester_plan(tester_name)
+    available_task_ids = [tid for tid, status in tester_plan if status == AVAILABLE]
+    plan_counts = task_index.status_counts(tester_name)
+    st.caption(f"✅ {plan_counts[COMPLETED]} completed · 🔓 {plan_counts[AVAILABLE]} available · "
+               f"🔒 {plan_counts[LOCKED]} locked")
 
     # Display task options
-    task_display_options = [
-        f"{tid} ✅ (Completed)" if tid in disabled_task_ids else
-        f"{tid} 🔒 (Locked)" if tid not in available_task_ids else
-        tid
-        for tid in sorted_task_ids
-    ]
+    task_display_options = {
+        tid: f"{tid} ✅ (Completed)" if status == COMPLETED else
+             f"{tid} 🔒 (Locked)" if status == LOCKED else
+             tid
+        for tid, status in tester_plan
+    }
 
     if available_task_ids:
         task_id = st.selectbox("🆔 Select Task ID",
                              options=available_task_ids,
-                             format_func=lambda x: task_display_options[sorted_task_ids.tolist().index(x)])
+                             format_func=lambda x: task_display_options[x])
        
         # Find matching task
-        search_id = normalize_id(task_id)
-        selected_row = tester_tasks[tester_tasks["Normalized_ID"] == search_id]
+        search_id = canonical_id(task_id)
+        selected_row = task_index.record(task_id)
 
-        if not selected_row.empty:
-            selected_row = selected_row.iloc[0]
+        if selected_row is not None:
             with st.expander("📋 Task Details", expanded=True):
                 st.text_input("📝 Task Heading", selected_row.get("Task Name", ""), disabled=True)
                 st.text_input("💡 Navigation", selected_row.get("Navigation", ""), disabled=True)
@@ -144,61 +150,48 @@ if page == "Testing App":
                 )
 
                 if screenshots:
+                    # Previews reuse the cached thumbnails that will be embedded on submit
+                    thumbnails = get_image_store().thumbnails(screenshots)
                     cols = st.columns(min(3, len(screenshots)))
-                    for i, img_file in enumerate(screenshots):
+                    for i, (img_file, thumbnail) in enumerate(zip(screenshots, thumbnails)):
                         with cols[i % 3]:
-                            st.image(Image.open(img_file), caption=img_file.name, use_container_width=True)
+                            st.image(thumbnail, caption=img_file.name, use_container_width=True)
 
-                if st.button("✅ Submit Task"):
-                    output = io.BytesIO()
+                # Keyed on the task: if another session completes it before the click lands,
+                # the rerun offers the next task and the click is dropped instead of moving to it
+                if st.button("✅ Submit Task", key=f"submit_{task_id}"):
                     screenshots = screenshots if screenshots else []
-                   
-                    # Save results to in-memory Excel file
-                    save_screenshots_to_excel(
-                        excel_path=output,
-                        df_main=df_main,
-                        wb=wb,
+                    store = get_image_store()
+
+                    # Record the submit as an operation in the journal; the engine later applies
+                    # it to the newest workbook and, if GitHub changed meanwhile, replays it on top
+                    submission = Submission(
                         task_id=task_id,
                         tester_name=tester_name,
                         test_result=test_result,
                         comment=comment,
-                        screenshots=screenshots,
-                        github_token = st.secrets["GITHUB_TOKEN"]
-
+                        image_refs=[store.put(screenshot) for screenshot in screenshots]
                     )
+                    try:
+                        engine.submit(submission)
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                    else:
+                        # This page already shows the result; keep the download button until the next interaction
+                        task_store_changes.clear()
 
-                    # Get raw bytes of the Excel file
-                    excel_bytes = output.getvalue()
-
-                    # Push to GitHub (before UI feedback)
-                    if GITHUB_ENABLED and 'GITHUB_TOKEN' in st.secrets:
-                        try:
-                            st.write("🔄 Pushing to Excel...")
-                            g = Github(st.secrets.GITHUB_TOKEN)
-                            repo = g.get_repo(GITHUB_REPO)
-                            contents = repo.get_contents(GITHUB_FILE)
-                            repo.update_file(
-                                path=GITHUB_FILE,
-                                message=f"Update by {tester_name} on Task {task_id}",
-                                content=excel_bytes,
-                                sha=contents.sha
-                            )
-                            st.success("✅ Updated Excel successfully!")
-                        except Exception as e:
-                            st.warning(f"⚠️ GitHub update failed: {str(e)}")
-
-                    # Offer file for download
-                    st.download_button(
-                        label="📥 Download Updated Excel",
-                        data=excel_bytes,
-                        file_name="updated_results.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
+                        if worker is not None:
+                            st.info("🔄 Excel update queued for GitHub")
+
+                        # Offer file for download (built when clicked, once the journal is compacted)
+                        st.download_button(
+                            label="📥 Download Updated Excel",
+                            data=engine.snapshot,
+                            file_name="updated_results.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
 
-                    st.balloons()
-                    time.sleep(10)
-                    # Optional: rerun the app to refresh task list
-                    st.rerun()
+                        st.balloons()
 
 
         else:
@@ -213,114 +206,136 @@ elif page == "Excel Sheet":
     st.title("📄 Excel Sheet Viewer")
 
     # Add a tester name filter
-    tester_filter = st.sidebar.selectbox("👤 Filter by Tester", ["All"] + sorted(df_main["Tester Name"].dropna().unique().tolist()))
-
-    if tester_filter != "All":
-        filtered_df = df_main[df_main["Tester Name"] == tester_filter]
+    tester_filter = st.sidebar.selectbox("👤 Filter by Tester", ["All"] + task_store.testers())
+
+    # Filtering, sorting and paging run in the task store; only the visible rows are loaded
+    search = st.text_input("🔎 Search Task ID, Task Name or Navigation")
+    all_columns = task_store.columns()
+    columns = st.multiselect("🧾 Columns", all_columns, default=all_columns)
+    sort_col, order_col, size_col = st.columns([2, 1, 1])
+    sort_by = sort_col.selectbox("↕️ Sort by", ["Sheet order"] + all_columns)
+    descending = order_col.selectbox("Order", ["Ascending", "Descending"]) == "Descending"
+    page_size = size_col.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+    tester_name = None if tester_filter == "All" else tester_filter
+    total = task_store.count(tester_name=tester_name, search=search)
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get("sheet_page", 1) > pages:
+        st.session_state["sheet_page"] = pages
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="sheet_page")
+
+    window, total = task_store.page(
+        columns=columns or all_columns,
+        tester_name=tester_name,
+        search=search,
+        sort_by=None if sort_by == "Sheet order" else sort_by,
+        descending=descending,
+        offset=(page_number - 1) * page_size,
+        limit=page_size,
+    )
+
+    if tester_name is not None:
         st.write(f"Showing tasks assigned to **{tester_filter}**:")
     else:
-        filtered_df = df_main
         st.write("Showing all tasks:")
+    first = (page_number - 1) * page_size
+    st.caption(f"Rows {first + 1 if total else 0}–{min(first + page_size, total)} of {total}")
 
     with st.container():
         st.markdown("<div class='scrollable-table'>", unsafe_allow_html=True)
-        st.dataframe(filtered_df, use_container_width=True)
+        st.dataframe(window, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
+
+    # Evidence packages hold only the selected tasks and are built when the button is clicked
+    with st.expander("📦 Export Evidence Package"):
+        export_tester = st.selectbox("👤 Tester", ["All"] + task_store.testers(), key="export_tester")
+        task_sheets = sorted(set(map(task_sheet_name, task_store.task_ids())), key=lambda name: (len(name), name))
+        export_sheet = st.selectbox("📄 Task Sheet", ["All"] + task_sheets, key="export_sheet")
+        export_dates = st.date_input("📅 Completed between", value=(), key="export_dates")
+        export_format = EXPORT_FORMATS[st.radio("🗂️ Format", list(EXPORT_FORMATS), horizontal=True)]
+
+        def build_package():
+            engine.compact()  # include results still in the journal
+            return export_bytes(
+                MAIN_EXCEL_PATH,
+                export_format,
+                tester_name=None if export_tester == "All" else export_tester,
+                task_sheet=None if export_sheet == "All" else export_sheet,
+                start=export_dates[0] if len(export_dates) > 0 else None,
+                end=export_dates[1] if len(export_dates) > 1 else None,
+            )
+
+        st.download_button(
+            label="📥 Download Package",
+            data=build_package,
+            file_name=f"evidence_package.{export_format}",
+            mime=EXPORT_MIME[export_format]
+        )
    
 
    
 elif page == "Analytics":
     st.title("📊 Analytics Dashboard")
 
-    # Filter rows with either Test Result or Timestamp
-    df_filtered = df_main[(df_main["Test Result"].notna()) | (df_main["Timestamp"].notna())].copy()
+    # Aggregates are computed once per workbook version; widget changes only slice them
+    from analytics import AnalyticsData
+    analytics = task_store.derived("analytics", AnalyticsData)
+
+    # Charts are cached images by default; Vega draws natively in the browser
+    backends = list(CHART_BACKENDS)
+    try:
+        default_backend = st.secrets.get("CHART_BACKEND", "Matplotlib")
+    except FileNotFoundError:
+        default_backend = "Matplotlib"
+    default_index = backends.index(default_backend) if default_backend in backends else 0
+    chart_backend = CHART_BACKENDS[st.sidebar.radio("📈 Chart Renderer", backends, index=default_index)]
 
     # Create layout
     col1, col2 = st.columns(2)
 
     # -- Graph 1: Test Result Summary Pie (LEFT) --
     with col1:
-        result_counts = df_filtered['Test Result'].dropna().value_counts()
-        result_counts = result_counts.reindex(['Pass', 'Fail', 'Hold']).fillna(0)
+        result_counts = analytics.result_counts
 
         if result_counts.sum() > 0:
-            fig, ax = plt.subplots()
-            colors = ['#28a745', '#dc3545', '#ffc107']
-            ax.pie(result_counts, labels=result_counts.index, autopct='%1.1f%%', startangle=90, colors=colors)
-            ax.axis('equal')
             st.markdown("### 📊 Test Result Summary")
-            st.pyplot(fig)
+            show_chart("results", result_counts, backend=chart_backend)
         else:
             st.warning("No test results available to display.")
 
     # -- Graph 2: Task Completion Over Time (RIGHT) --
-        # -- Graph 2: Task Completion Over Time (RIGHT) --
     with col2:
-        if "Timestamp" in df_filtered.columns:
-            df_filtered["Date"] = pd.to_datetime(df_filtered["Timestamp"], errors='coerce').dt.date
-            df_filtered = df_filtered.dropna(subset=["Date"])
-
-            if not df_filtered.empty:
-                # Add date range filter
-                min_date = df_filtered["Date"].min()
-                max_date = df_filtered["Date"].max()
-                start_date, end_date = st.date_input(
-                    "📅 Select Date Range",
-                    value=(min_date, max_date),
-                    min_value=min_date,
-                    max_value=max_date,
-                )
-
-                filtered_dates = df_filtered[
-                    (df_filtered["Date"] >= start_date) & (df_filtered["Date"] <= end_date)
-                ]
-                date_summary = filtered_dates.groupby("Date").size().reset_index(name="Tasks Completed")
-
-                st.markdown("### 📈 Task Completion Over Time")
-                fig, ax = plt.subplots(figsize=(6, 4))
-                sns.lineplot(data=date_summary, x="Date", y="Tasks Completed", marker="o", ax=ax)
-                ax.set_ylabel("Tasks")
-                ax.set_xlabel("Date")
-                ax.set_title("Tasks Completed Per Day")
-
-                # Format the x-axis
-                ax.set_xticks(date_summary["Date"])
-                ax.set_xticklabels(date_summary["Date"].astype(str), rotation=45, ha='right')
-
-                st.pyplot(fig)
-            else:
-                st.info("No valid timestamp data found.")
+        if analytics.date_bounds is not None:
+            # Add date range filter
+            min_date, max_date = analytics.date_bounds
+            start_date, end_date = st.date_input(
+                "📅 Select Date Range",
+                value=(min_date, max_date),
+                min_value=min_date,
+                max_value=max_date,
+            )
+
+            date_summary = analytics.daily_completions(start_date, end_date)
+
+            st.markdown("### 📈 Task Completion Over Time")
+            show_chart("timeline", date_summary, backend=chart_backend)
+        else:
+            st.info("No valid timestamp data found.")
     # -- Graph 3: Tasks Completed Per Tester (BOTTOM) --
     st.markdown("### 🧑‍💻 Tasks Completed Per Tester")
 
-    tester_filter = st.selectbox("👤 Filter by Tester", ["All"] + sorted(df_filtered["Tester Name"].dropna().unique()))
-
-    if tester_filter != "All":
-        tester_data = df_filtered[df_filtered["Tester Name"] == tester_filter]
-    else:
-        tester_data = df_filtered
+    tester_filter = st.selectbox("👤 Filter by Tester", ["All"] + sorted(analytics.testers))
 
-    tester_summary = tester_data["Tester Name"].value_counts().reset_index()
-    tester_summary.columns = ["Tester Name", "Tasks Completed"]
+    tester_summary = analytics.tester_summary(tester_filter)
 
     if not tester_summary.empty:
-        fig, ax = plt.subplots(figsize=(6, 3))  # Smaller size
-        sns.barplot(data=tester_summary, x="Tester Name", y="Tasks Completed", palette="Blues_d", ax=ax)
-       
-        ax.set_xlabel("Tester", fontsize=10)
-        ax.set_ylabel("Task Count", fontsize=10)
-        ax.set_title("Tasks Completed Per Tester", fontsize=12)
-        ax.tick_params(axis='x', labelrotation=0, labelsize=8)
-        ax.tick_params(axis='y', labelsize=8)
-        fig.tight_layout()  # Adjust spacing to avoid cut-offs
-
-        st.pyplot(fig)
+        show_chart("testers", tester_summary, backend=chart_backend)
     else:
         st.info("No tester task completion data available.")
         # -- Completion Progress Bar --
-    total_tasks = df_main.shape[0]
-    completed_tasks = df_main["Test Result"].notna().sum()
-    completion_percent = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
+    total_tasks = analytics.total_tasks
+    completed_tasks = analytics.completed_tasks
+    completion_percent = analytics.completion_percent
 
     st.markdown("### 📈 Overall Task Completion")
 
@@ -330,3 +345,33 @@ elif page == "Analytics":
 
     # Render progress bar
     st.progress(completion_percent)
+
+perf.record(f"page.{page}", time.perf_counter() - page_started)
+
+# Debug panel: per-stage timings of this process, across all sessions
+if st.sidebar.checkbox("🛠️ Debug Panel"):
+    with st.sidebar.expander("⏱️ Timings", expanded=True):
+        timings = sorted(perf.stats().items(), key=lambda item: -item[1]["total"])
+        st.dataframe([
+            {
+                "Span": name,
+                "Calls": entry["count"],
+                "Mean ms": round(entry["mean"] * 1000, 1),
+                "Max ms": round(entry["max"] * 1000, 1),
+                "Last ms": round(entry["last"] * 1000, 1),
+            }
+            for name, entry in timings
+        ], hide_index=True, use_container_width=True)
+        st.caption("Latest spans")
+        st.code("\n".join(
+            f"{'  ' * item['depth']}{item['span']:<28} {item['ms']:8.1f} ms  [{item['thread']}]"
+            for item in perf.recent()[-15:]
+        ) or "-")
+
+        perf.set_profiling(st.checkbox("🔬 Profile with cProfile", value=perf.profiling_enabled()))
+        reports = perf.profiles()
+        if reports:
+            report = st.selectbox("📄 Profile", sorted(reports))
+            st.code(reports[report])
+        if st.button("🧹 Reset Timings"):
+            perf.reset()
@@ -0,0 +1,139 @@
+"""Timing spans for the load, submit and sync paths.
+
+    with span("workbook.save"):
+        wb.save(target)
+
+    @timed("summary.update")
+    def update_summary(...):
+
+Every span adds its duration to process-wide per-name statistics and to a
+short log of recent spans (with the thread and nesting depth), which the
+sidebar debug panel and benchmarks.py read. Spans cost two perf_counter()
+calls. When profiling is on (set_profiling(True), or PERF_PROFILE=1 in the
+environment) the outermost span of each thread also runs under cProfile and
+the report of the latest run per span name is kept.
+"""
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+RECENT_SPANS = 200
+PROFILE_LINES = 30
+
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+_recent = deque(maxlen=RECENT_SPANS)
+_profiles = {}
+_profiling = {"enabled": os.environ.get("PERF_PROFILE") == "1", "active": False}
+
+
+def set_profiling(enabled):
+    _profiling["enabled"] = bool(enabled)
+
+
+def profiling_enabled():
+    return _profiling["enabled"]
+
+
+def _start_profile():
+    # cProfile hooks the interpreter globally, so only one span is profiled at a time
+    with _lock:
+        if not _profiling["enabled"] or _profiling["active"]:
+            return None
+        _profiling["active"] = True
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # another profiler is already running
+        _profiling["active"] = False
+        return None
+    return profile
+
+
+def _finish_profile(name, profile):
+    profile.disable()
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    with _lock:
+        _profiling["active"] = False
+        _profiles[name] = out.getvalue()
+
+
+def record(name, seconds, depth=0):
+    """Add one measured duration, for code that cannot be wrapped in a span"""
+    with _lock:
+        entry = _stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        entry["last"] = seconds
+        _recent.append({
+            "span": name,
+            "ms": seconds * 1000,
+            "depth": depth,
+            "thread": threading.current_thread().name,
+            "at": time.time(),
+        })
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block under name"""
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    profile = _start_profile() if depth == 0 else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _local.depth = depth
+        if profile is not None:
+            _finish_profile(name, profile)
+        record(name, seconds, depth)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def stats():
+    """{span name: {"count", "total", "mean", "max", "last"}} in seconds"""
+    with _lock:
+        return {
+            name: dict(entry, mean=entry["total"] / entry["count"])
+            for name, entry in _stats.items()
+        }
+
+
+def recent():
+    """Latest spans, newest last"""
+    with _lock:
+        return list(_recent)
+
+
+def profiles():
+    """{span name: cProfile report of its latest profiled run}"""
+    with _lock:
+        return dict(_profiles)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _recent.clear()
+        _profiles.clear()
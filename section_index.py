@@ -0,0 +1,78 @@
+import json
+from openpyxl.packaging.custom import StringProperty
+
+SECTION_PROPERTY_PREFIX = "sections:"
+BLOCK_LABELS = ("Task", "Subtask")
+
+
+def _property_name(sheet_name):
+    return f"{SECTION_PROPERTY_PREFIX}{sheet_name}"
+
+
+def load_sections(book, sheet_name):
+    """{block text: [start row, end row]} persisted for a "Task ID N" sheet, or None"""
+    name = _property_name(sheet_name)
+    if name not in book.custom_doc_props.names:
+        return None
+    try:
+        return {text: list(rows) for text, rows in json.loads(book.custom_doc_props[name].value).items()}
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def save_sections(book, sheet_name, sections):
+    """Persist a sheet's section map as a custom document property"""
+    name = _property_name(sheet_name)
+    props = book.custom_doc_props
+    props.props = [prop for prop in props.props if prop.name != name]
+    props.append(StringProperty(name=name, value=json.dumps(sections, separators=(",", ":"))))
+
+
+def block_end(ws, start):
+    """First row after a block's label row that is blank or starts another block"""
+    row = start
+    while True:
+        row += 1
+        if ws.cell(row=row, column=1).value in [None, "", *BLOCK_LABELS]:
+            return row
+
+
+def scan_sections(ws):
+    """Rebuild a sheet's section map with one pass over column A/B (legacy sheets)"""
+    sections = {}
+    for label_cell, text_cell in ws.iter_rows(min_row=1, max_col=2):
+        if label_cell.value in BLOCK_LABELS and text_cell.value not in sections:
+            sections[text_cell.value] = [label_cell.row, block_end(ws, label_cell.row)]
+    return sections
+
+
+def find_section(ws, sections, label, text):
+    """Start and end rows of a block via the index, or None if the sheet has no such block.
+
+    The indexed rows are checked against the sheet; a stale entry (e.g. after a
+    manual edit in Excel) makes the caller rescan with scan_sections().
+    """
+    rows = sections.get(text)
+    if rows is None:
+        return None
+    start, end = rows
+    if ws.cell(row=start, column=1).value != label or ws.cell(row=start, column=2).value != text:
+        raise LookupError(f"Section index for {text!r} is stale")
+    if ws.cell(row=end, column=1).value not in [None, "", *BLOCK_LABELS]:
+        end = block_end(ws, start)
+    return start, end
+
+
+def locate_section(book, ws, label, text):
+    """(section map, (start, end) or None) for a block, rescanning only if the index is missing or stale"""
+    sections = load_sections(book, ws.title)
+    if sections is not None:
+        try:
+            return sections, find_section(ws, sections, label, text)
+        except LookupError:
+            pass
+    sections = scan_sections(ws)
+    rows = sections.get(text)
+    if rows is None or ws.cell(row=rows[0], column=1).value != label:
+        return sections, None
+    return sections, tuple(rows)
@@ -0,0 +1,398 @@
+import io
+import os
+import hashlib
+import time
+import uuid
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import streamlit as st
+from image_store import get_image_store
+from journal import ResultsJournal, JOURNAL_SUFFIX
+from summary import update_summary
+from task_index import TaskIndex
+from task_store import TaskStore, TASK_STORE_SUFFIX
+from utils import record_submission, task_sheet_name, write_local_workbook
+from workbook import LazyWorkbook, ensure_packed
+from perf import timed
+
+TEST_RESULTS = ("Pass", "Fail", "Hold")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Submission:
+    """One tester's submit as a self-contained, replayable operation.
+
+    Screenshots are referenced by their content hash in the image store, so an
+    operation can be applied again on top of a newer workbook.
+    """
+
+    def __init__(self, task_id, tester_name, test_result, comment, image_refs, op_id=None, created=None):
+        self.task_id = str(task_id)
+        self.tester_name = tester_name
+        self.test_result = test_result
+        self.comment = comment
+        self.image_refs = list(image_refs)
+        self.op_id = op_id or uuid.uuid4().hex
+        self.created = created or datetime.now(ZoneInfo("Asia/Kolkata")).strftime(TIMESTAMP_FORMAT)
+
+    @property
+    def message(self):
+        return f"Update by {self.tester_name} on Task {self.task_id}"
+
+    def to_dict(self):
+        return {
+            "op_id": self.op_id,
+            "created": self.created,
+            "task_id": self.task_id,
+            "tester_name": self.tester_name,
+            "test_result": self.test_result,
+            "comment": self.comment,
+            "image_refs": self.image_refs,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def submission_errors(submission, store, known_task):
+    """Reasons a submission could not be applied to the workbook ([] if it can).
+
+    known_task(task_id) tells whether Sheet1 has the task.
+    """
+    errors = []
+    if not known_task(submission.task_id):
+        errors.append(f"unknown Task ID {submission.task_id!r}")
+    if not str(submission.tester_name or "").strip():
+        errors.append("missing Tester Name")
+    if submission.test_result not in TEST_RESULTS:
+        errors.append(f"Test Result must be one of {', '.join(TEST_RESULTS)}")
+    try:
+        datetime.strptime(submission.created, TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        errors.append(f"Timestamp {submission.created!r} is not YYYY-MM-DD HH:MM:SS")
+    missing = [digest for digest in submission.image_refs if not store.has(digest)]
+    if missing:
+        errors.append(f"{len(missing)} screenshot(s) missing from the image store")
+    return errors
+
+
+@timed("workbook.apply_submissions")
+def apply_submissions(excel_path, submissions, store=None, journal=None, offset=None):
+    """Apply operations in order to the workbook at excel_path and return the new workbook bytes.
+
+    The workbook is opened and saved once, and the Summary sheet refreshed
+    once, for the whole batch. With a journal, the result is stamped as
+    containing it up to offset.
+    """
+    store = store or get_image_store()
+    # A missing screenshot is the entry's fault, not an I/O failure to retry
+    missing = [digest for submission in submissions for digest in submission.image_refs if not store.has(digest)]
+    if missing:
+        raise ValueError(f"Screenshots not in the image store: {', '.join(missing)}")
+    # Render every thumbnail of the batch in one thread pool; the per-task writes then read them from disk
+    store.prerender(digest for submission in submissions for digest in submission.image_refs)
+    wb = LazyWorkbook(excel_path)
+    df = wb.read_dataframe("Sheet1")
+    df["Task ID"] = df["Task ID"].astype(str).str.strip()
+    task_index = TaskIndex(df)
+    sheets = dict.fromkeys(task_sheet_name(submission.task_id) for submission in submissions)
+    book = wb.open_for_write([*sheets, "Sheet1", "Summary"])
+    changes = []
+    for submission in submissions:
+        changes.append(record_submission(
+            wb, task_index,
+            task_id=submission.task_id,
+            tester_name=submission.tester_name,
+            test_result=submission.test_result,
+            comment=submission.comment,
+            screenshots=[store.original(digest) for digest in submission.image_refs],
+            store=store,
+            timestamp=submission.created,
+            refresh_summary=False
+        ))
+    if submissions:
+        last = submissions[-1]
+        update_summary(book, wb["Sheet1"], last.task_id, last.tester_name, updated_on=last.created, changes=changes)
+    if journal is not None:
+        journal.mark(book.custom_doc_props, offset)
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+class SubmissionEngine:
+    """Journals submissions, compacts them into the workbook and pushes it to GitHub without lost updates.
+
+    A submit is one fsync'd append to the results journal plus an indexed
+    update of the task store the app reads from. A background
+    compactor applies new journal entries to the local xlsx in a single
+    open/save, shortly after a submit (compact_delay batches bursts) and every
+    compact_interval seconds; compact() does the same on demand. The
+    workbook records how far into the journal it is, so no entry is applied
+    twice, even after a crash. Submissions are checked before they are
+    journaled; an entry that still fails to apply is quarantined (see
+    ResultsJournal.quarantine) and compaction moves past it.
+
+    Each push is conditional on the remote version the local file was built
+    from. When the branch has moved, the engine fetches it, replays the
+    compacted entries the branch does not have yet and retries. When two
+    testers submit the same task, both evidence blocks are kept and the later
+    result wins in Sheet1.
+    """
+
+    def __init__(self, excel_path, remote=None, store=None, journal=None, task_store=None,
+                 compact_delay=1.0, compact_interval=60.0, **worker_options):
+        self.excel_path = excel_path
+        self.remote = remote
+        self.store = store or get_image_store()
+        self.journal = journal or ResultsJournal(excel_path + JOURNAL_SUFFIX)
+        self.compact_delay = compact_delay
+        self.compact_interval = compact_interval
+        self.tasks = task_store or TaskStore(excel_path + TASK_STORE_SUFFIX)
+        self._lock = threading.RLock()
+        self._submit_lock = threading.Lock()
+        self._wake = threading.Event()
+        ensure_packed(excel_path)
+        self._compacted = self._recorded_offset(self.journal.start)
+        self._sync_task_store()
+        self.compact_error = None
+        self.pushed_offset = self._compacted
+        self.base_version = None
+        self.rebases = 0
+        self.worker = None
+        if remote is not None:
+            from github_sync import SyncWorker
+            if os.path.exists(excel_path):
+                with open(excel_path, "rb") as f:
+                    self.base_version = remote.version_of(f.read())
+            self.worker = SyncWorker(self._push, rebase=self._rebase, **worker_options)
+        self._compactor = threading.Thread(target=self._run_compactor, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    def _recorded_offset(self, default):
+        """How far into the journal the local xlsx is, per its custom property"""
+        offset = self.journal.offset_in(LazyWorkbook(self.excel_path).custom_properties())
+        return default if offset is None else offset
+
+    def _source_stat(self):
+        stat = os.stat(self.excel_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    @timed("task_store.sync")
+    def _sync_task_store(self):
+        """Import the xlsx into the task store if it changed, then apply the journal entries the store lacks.
+
+        The file is only hashed when its size or mtime differ from the last
+        check, so restarting on an unchanged workbook does not read it at all.
+        """
+        with self._submit_lock:
+            stat = self._source_stat()
+            same_journal = self.tasks.meta("journal") == self.journal.journal_id
+            if self.tasks.meta("source_stat") != stat or not same_journal:
+                with open(self.excel_path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                if self.tasks.meta("source_digest") != digest or not same_journal:
+                    self.tasks.import_workbook(self.excel_path, digest, journal=self.journal.journal_id,
+                                               journal_offset=self._compacted)
+                self.tasks.set_meta(source_stat=stat)
+            entries = self.journal.read(int(self.tasks.meta("journal_offset")))
+            if entries:
+                skipped = self._quarantined_offsets()
+                self.tasks.apply_many([Submission.from_dict(entry) for entry, end in entries if end not in skipped],
+                                      journal_offset=entries[-1][1])
+
+    def _quarantined_offsets(self):
+        return {item["offset"] for item in self.journal.quarantined()}
+
+    def quarantined(self):
+        """Journal entries set aside because they could not be applied, with their errors"""
+        return self.journal.quarantined()
+
+    def _check(self, submissions):
+        """Raise ValueError listing every submission that could not be applied, before anything is journaled"""
+        known_task = lambda task_id: self.tasks.record(task_id) is not None
+        errors = [f"Task {submission.task_id}: {error}" for submission in submissions
+                  for error in submission_errors(submission, self.store, known_task)]
+        if errors:
+            raise ValueError("Invalid submissions:\n" + "\n".join(errors))
+
+    @timed("submit.journal")
+    def submit(self, submission):
+        """Durably record a submission; it reaches the xlsx and GitHub in the background"""
+        self._check([submission])
+        with self._submit_lock:
+            offset = self.journal.append(submission.to_dict())
+            self.tasks.apply(submission, journal_offset=offset)
+        self._wake.set()
+        return offset
+
+    @timed("submit.batch")
+    def submit_batch(self, submissions, message=None):
+        """Record many submissions at once and write them to the xlsx before returning.
+
+        The batch is one journal write, one task store transaction and one
+        compaction (a single open/save and Summary refresh), and it reaches
+        GitHub as one commit. Returns the submissions.
+        """
+        submissions = list(submissions)
+        if not submissions:
+            return submissions
+        self._check(submissions)
+        with self._submit_lock:
+            offset = self.journal.extend([submission.to_dict() for submission in submissions])
+            self.tasks.apply_many(submissions, journal_offset=offset)
+        self.compact(message or f"Batch import of {len(submissions)} results")
+        return submissions
+
+    @timed("journal.compact")
+    def compact(self, message=None):
+        """Apply every new journal entry to the local xlsx; returns the submissions applied.
+
+        The GitHub commit gets one line per submission, or message when given.
+        """
+        with self._lock:
+            entries = self.journal.read(self._compacted)
+            if not entries:
+                return []
+            offset = entries[-1][1]
+            try:
+                submissions, data, rejected = self._apply_entries(entries, offset)
+            except Exception:
+                # Entries applied one at a time before the failure are already in the file
+                self._compacted = self._recorded_offset(self._compacted)
+                raise
+            self._compacted = offset
+            if rejected:
+                # The store shows the rejected results; rebuild it from the xlsx, which lacks them
+                self.tasks.set_meta(source_digest="")
+                self._sync_task_store()
+            else:
+                # The store already holds these results; it now also matches the new file
+                self.tasks.set_meta(source_digest=hashlib.sha256(data).hexdigest(), source_stat=self._source_stat())
+        if self.worker is not None:
+            for commit_message in [message] if message else [submission.message for submission in submissions]:
+                self.worker.submit(None, commit_message)
+        return submissions
+
+    def _apply_entries(self, entries, offset):
+        """Apply journal entries to the local xlsx, stamped as containing the journal up to offset.
+
+        Quarantined entries are skipped. If the batch fails, its entries are
+        applied one at a time and each one that fails again while the workbook
+        alone still applies is quarantined, so a bad entry never holds back the
+        ones after it. OSErrors and a workbook that cannot be opened propagate
+        instead, leaving the entries in the journal for the next attempt.
+        Returns the applied submissions, the new workbook bytes and the number
+        quarantined.
+        """
+        skipped = self._quarantined_offsets()
+        entries = [(entry, end) for entry, end in entries if end not in skipped]
+        try:
+            submissions = [Submission.from_dict(entry) for entry, _ in entries]
+            data = apply_submissions(self.excel_path, submissions, self.store, self.journal, offset)
+            rejected = 0
+        except OSError:
+            raise
+        except Exception:
+            submissions, rejected = [], 0
+            for entry, end in entries:
+                try:
+                    submission = Submission.from_dict(entry)
+                    data = apply_submissions(self.excel_path, [submission], self.store, self.journal, end)
+                except OSError:
+                    raise
+                except Exception as e:
+                    # The entry is only at fault if the workbook itself still applies; otherwise this raises
+                    apply_submissions(self.excel_path, [], self.store, self.journal, end)
+                    self.journal.quarantine(entry, end, f"{type(e).__name__}: {e}")
+                    rejected += 1
+                    continue
+                write_local_workbook(self.excel_path, data)
+                submissions.append(submission)
+            # Stamp the whole range, so a quarantined last entry is not read again
+            data = apply_submissions(self.excel_path, [], self.store, self.journal, offset)
+        write_local_workbook(self.excel_path, data)
+        return submissions, data, rejected
+
+    def snapshot(self):
+        """Current workbook bytes, including every journaled submission"""
+        with self._lock:
+            self.compact()
+            with open(self.excel_path, "rb") as f:
+                return f.read()
+
+    def export_workbook(self, target):
+        """Write the up-to-date xlsx, with every journaled submission compacted, to target"""
+        write_local_workbook(target, self.snapshot())
+
+    def _run_compactor(self):
+        while True:
+            if self._wake.wait(self.compact_interval):
+                time.sleep(self.compact_delay)
+            self._wake.clear()
+            try:
+                self.compact()
+                self.compact_error = None
+            except Exception as e:
+                # Entries stay in the journal; the next wake-up retries them
+                self.compact_error = str(e)
+            self._resync()
+
+    def _resync(self):
+        """Queue another push when compacted results are not on GitHub and the worker gave up on them"""
+        if self.worker is None or self.worker.status()["state"] in ("pending", "syncing"):
+            return
+        with self._lock:
+            behind = self.pushed_offset < self._compacted
+        if behind:
+            self.worker.submit(None, "Sync results that did not reach GitHub")
+
+    def _push(self, content, message):
+        # The local file holds every compacted entry; push the newest state
+        with self._lock:
+            with open(self.excel_path, "rb") as f:
+                content = f.read()
+            offset = self._compacted
+            base_version = self.base_version
+        version = self.remote.push(content, message, base_version)
+        with self._lock:
+            self.base_version = version
+            self.pushed_offset = offset
+
+    @timed("github.rebase")
+    def _rebase(self):
+        """Rebuild the local workbook as the branch's workbook plus the compacted entries it lacks"""
+        remote_content, version = self.remote.fetch()
+        with self._lock:
+            if remote_content is not None:
+                with open(self.excel_path, "rb") as f:
+                    local_content = f.read()
+                write_local_workbook(self.excel_path, remote_content)
+                try:
+                    remote_offset = self._recorded_offset(self.pushed_offset)
+                    self._apply_entries(self.journal.read(remote_offset, self._compacted), self._compacted)
+                except Exception:
+                    # A branch file that cannot be applied to must not replace the local one
+                    write_local_workbook(self.excel_path, local_content)
+                    raise
+            self.base_version = version
+            self.rebases += 1
+            self._sync_task_store()
+
+
+@st.cache_resource
+def get_submission_engine(excel_path, repo=None, repo_file_path=None, github_token=None,
+                          branch="main", api_url=None, transport="contents"):
+    """One submission engine per process, shared by every session (local-only without a token).
+
+    The GitHub modules (and requests) are only imported when a token is configured.
+    """
+    remote = None
+    if github_token:
+        from github_client import GitHubClient, GITHUB_API_URL
+        from github_sync import RemoteWorkbook
+        client = GitHubClient(repo, github_token, branch=branch, api_url=api_url or GITHUB_API_URL)
+        remote = RemoteWorkbook(client, repo_file_path, transport)
+    return SubmissionEngine(excel_path, remote)
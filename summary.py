@@ -0,0 +1,244 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from openpyxl.styles import Font, PatternFill
+from openpyxl.chart import PieChart, LineChart, BarChart, Reference
+from openpyxl.chart.label import DataLabelList
+from openpyxl.packaging.custom import StringProperty
+from openpyxl.utils.cell import coordinate_to_tuple
+from perf import timed
+
+SUMMARY_SHEET = "Summary"
+COUNTERS_PROPERTY = "summary:counters"
+RESULTS = ("Pass", "Fail", "Hold")
+DATE_HEADER_ROW = 19
+TESTER_HEADER_ROW = 39
+PIE_ANCHOR, LINE_ANCHOR, BAR_ANCHOR = "D2", "D18", "D35"
+FINGERPRINT_MOD = 1 << 64
+VERIFY_INTERVAL = 600
+
+
+def _date_key(timestamp):
+    import pandas as pd
+    return str(pd.to_datetime(timestamp).date())
+
+
+def build_counters(main_ws):
+    """Full aggregation of Sheet1 (used once, when no running counters are stored yet)"""
+    import pandas as pd
+    df = pd.DataFrame(main_ws.values)
+    headers = df.iloc[0].tolist()
+    df.columns = [str(col).strip() if col is not None else f"Column_{i}" for i, col in enumerate(headers)]
+    df = df.drop(index=0).reset_index(drop=True)
+
+    counters = {
+        "total": df.shape[0],
+        "results": {result: int((df["Test Result"] == result).sum()) for result in RESULTS},
+        "dates": {},
+        "testers": {},
+    }
+    if "Timestamp" in df.columns:
+        dates = pd.to_datetime(df.loc[df["Timestamp"].notna(), "Timestamp"]).dt.date
+        counters["dates"] = {str(date): int(count) for date, count in dates.value_counts().items()}
+    if "Tester Name" in df.columns and "Test Result" in df.columns:
+        testers = df.loc[df["Test Result"].notna(), "Tester Name"].value_counts()
+        counters["testers"] = {str(name): int(count) for name, count in testers.items()}
+    return counters
+
+
+def _row_hash(row):
+    return int.from_bytes(hashlib.blake2b(repr(tuple(row)).encode(), digest_size=8).digest(), "big")
+
+
+def sheet1_fingerprint(main_ws):
+    """Order-independent hash of Sheet1's (tester, result, timestamp) columns, the inputs of the counters.
+
+    It is a sum of row hashes, so a submission updates it from its before and
+    after values alone; only a check against the sheet needs this full pass.
+    """
+    rows = main_ws.iter_rows(min_row=2, min_col=5, max_col=7, values_only=True)
+    return sum(_row_hash(row) for row in rows) % FINGERPRINT_MOD
+
+
+def _advance_fingerprint(fingerprint, changes):
+    for before, after in changes:
+        if before is not None and after is not None:
+            fingerprint += _row_hash(after) - _row_hash(before)
+    return fingerprint % FINGERPRINT_MOD
+
+
+def _bump(table, key, delta):
+    table[key] = table.get(key, 0) + delta
+    if table[key] <= 0:
+        del table[key]
+
+
+def apply_delta(counters, before, after):
+    """Move one task's contribution from `before` to `after` ((tester, result, timestamp) tuples)"""
+    for (tester, result, timestamp), sign in ((before, -1), (after, 1)):
+        if result in RESULTS:
+            counters["results"][result] += sign
+        if timestamp == timestamp and timestamp not in ("", None):  # NaN != NaN
+            _bump(counters["dates"], _date_key(timestamp), sign)
+        if result is not None and result == result and tester is not None and tester == tester:
+            _bump(counters["testers"], str(tester), sign)
+
+
+def load_counters(book):
+    if COUNTERS_PROPERTY not in book.custom_doc_props.names:
+        return None
+    try:
+        return json.loads(book.custom_doc_props[COUNTERS_PROPERTY].value)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _save_counters(book, counters):
+    props = book.custom_doc_props
+    props.props = [prop for prop in props.props if prop.name != COUNTERS_PROPERTY]
+    props.append(StringProperty(name=COUNTERS_PROPERTY, value=json.dumps(counters, separators=(",", ":"))))
+
+
+def _chart_row(chart):
+    anchor = chart.anchor
+    if isinstance(anchor, str):
+        return coordinate_to_tuple(anchor)[0]
+    return anchor._from.row + 1
+
+
+def _replace_chart(ws, anchor, chart):
+    row = coordinate_to_tuple(anchor)[0]
+    ws._charts = [c for c in ws._charts if _chart_row(c) != row]
+    ws.add_chart(chart, anchor)
+
+
+def _pie_chart(ws):
+    labels = Reference(ws, min_col=1, min_row=2, max_row=4)
+    data = Reference(ws, min_col=2, min_row=2, max_row=4)
+    pie_chart = PieChart()
+    pie_chart.title = "Test Result Summary"
+    pie_chart.add_data(data, titles_from_data=False)
+    pie_chart.set_categories(labels)
+    pie_chart.dataLabels = DataLabelList()
+    pie_chart.dataLabels.showVal = True
+    return pie_chart
+
+
+def _line_chart(ws, n):
+    line_chart = LineChart()
+    line_chart.title = "Task Completion Over Time"
+    line_chart.y_axis.title = "Tasks Completed"
+    line_chart.x_axis.title = "Date"
+    line_chart.add_data(Reference(ws, min_col=2, min_row=DATE_HEADER_ROW, max_row=DATE_HEADER_ROW + n), titles_from_data=True)
+    line_chart.set_categories(Reference(ws, min_col=1, min_row=DATE_HEADER_ROW + 1, max_row=DATE_HEADER_ROW + n))
+    return line_chart
+
+
+def _bar_chart(ws, n):
+    bar_chart = BarChart()
+    bar_chart.title = "Tasks Completed Per Tester"
+    bar_chart.y_axis.title = "Task Count"
+    bar_chart.x_axis.title = "Tester"
+    bar_chart.add_data(Reference(ws, min_col=2, min_row=TESTER_HEADER_ROW, max_row=TESTER_HEADER_ROW + n), titles_from_data=True)
+    bar_chart.set_categories(Reference(ws, min_col=1, min_row=TESTER_HEADER_ROW + 1, max_row=TESTER_HEADER_ROW + n))
+    return bar_chart
+
+
+def _write_table(ws, header_row, headers, rows, previous_len):
+    for col, header in enumerate(headers, start=1):
+        ws.cell(row=header_row, column=col).value = header
+        ws.cell(row=header_row, column=col).font = Font(bold=True)
+    for i, (key, count) in enumerate(rows, start=header_row + 1):
+        ws.cell(row=i, column=1).value = key
+        ws.cell(row=i, column=2).value = count
+    for i in range(header_row + 1 + len(rows), header_row + 1 + previous_len):
+        ws.cell(row=i, column=1).value = None
+        ws.cell(row=i, column=2).value = None
+
+
+@timed("summary.update")
+def update_summary(book, main_ws, task_id, tester_name, before=None, after=None, updated_on=None, changes=(),
+                   verify=None):
+    """Refresh the Summary sheet after one task changed from `before` to `after`.
+
+    Running counters are kept in a workbook custom property, so a submit only
+    applies a delta instead of re-aggregating Sheet1. The date and tester
+    tables are rewritten from the counters (they are small), and a chart is
+    rebuilt only when its category range changed size. A batch passes all its
+    (before, after) pairs as changes and refreshes the sheet once;
+    task_id/tester_name are then those of the last submission.
+
+    The counters carry a fingerprint of Sheet1's tester/result/timestamp
+    columns, advanced from the changes. It is checked against the sheet (a
+    pass over every row) at most every VERIFY_INTERVAL seconds, or always/never
+    with verify=True/False, and the counters are rebuilt when Sheet1 was
+    edited outside the app.
+    """
+    summary_ws = book[SUMMARY_SHEET] if SUMMARY_SHEET in book.sheetnames else book.create_sheet(SUMMARY_SHEET)
+
+    counters = load_counters(book)
+    changes = [*changes, (before, after)]
+    now = int(time.time())
+    stale = counters is None or counters.get("total") != main_ws.max_row - 1 or "fingerprint" not in counters
+    if not stale:
+        fingerprint = _advance_fingerprint(int(counters["fingerprint"], 16), changes)
+        if verify or (verify is None and now - counters.get("verified", 0) >= VERIFY_INTERVAL):
+            stale = sheet1_fingerprint(main_ws) != fingerprint
+            counters["verified"] = now
+    if stale:
+        counters = build_counters(main_ws)
+        fingerprint = sheet1_fingerprint(main_ws)
+        counters["verified"] = now
+        previous = {"dates": -1, "testers": -1}
+    else:
+        previous = {"dates": len(counters["dates"]), "testers": len(counters["testers"])}
+        for change_before, change_after in changes:
+            if change_before is not None and change_after is not None:
+                apply_delta(counters, change_before, change_after)
+    counters["fingerprint"] = f"{fingerprint:016x}"
+
+    total_tasks = counters["total"]
+    pass_count, fail_count, hold_count = (counters["results"][result] for result in RESULTS)
+    pass_rate = f"{(pass_count / total_tasks * 100):.2f}%" if total_tasks else "0%"
+
+    summary_data = [
+        ("Total Tasks", total_tasks),
+        ("Pass", pass_count),
+        ("Fail", fail_count),
+        ("Hold", hold_count),
+        ("Pass Rate", pass_rate),
+        ("Last Updated Task ID", task_id),
+        ("Last Updated By", tester_name),
+        ("Last Updated On", updated_on or datetime.now(ZoneInfo("Asia/Kolkata")).strftime("%Y-%m-%d %H:%M:%S"))
+    ]
+
+    for i, (label, value) in enumerate(summary_data, start=1):
+        summary_ws.cell(row=i, column=1).value = label
+        summary_ws.cell(row=i, column=2).value = value
+        summary_ws.cell(row=i, column=1).font = Font(bold=True)
+
+    anchored = {_chart_row(chart) for chart in summary_ws._charts}
+    if coordinate_to_tuple(PIE_ANCHOR)[0] not in anchored:
+        _replace_chart(summary_ws, PIE_ANCHOR, _pie_chart(summary_ws))
+
+    progress_row = 12
+    percent_complete = (pass_count + fail_count + hold_count) / total_tasks if total_tasks else 0
+    progress_bar = int(percent_complete * 20) * "█" + (20 - int(percent_complete * 20)) * "-"
+    summary_ws.cell(row=progress_row, column=1).value = "Progress"
+    summary_ws.cell(row=progress_row, column=2).value = f"[{progress_bar}] {int(percent_complete * 100)}%"
+    summary_ws.cell(row=progress_row, column=2).fill = PatternFill(start_color="ADD8E6", end_color="ADD8E6", fill_type="solid")
+
+    dates = sorted(counters["dates"].items())
+    _write_table(summary_ws, DATE_HEADER_ROW, ["Date", "Test Count"], dates, max(previous["dates"], 0))
+    if len(dates) != previous["dates"] or coordinate_to_tuple(LINE_ANCHOR)[0] not in anchored:
+        _replace_chart(summary_ws, LINE_ANCHOR, _line_chart(summary_ws, len(dates)))
+
+    testers = sorted(counters["testers"].items(), key=lambda item: -item[1])
+    _write_table(summary_ws, TESTER_HEADER_ROW, ["Tester Name", "Test Count"], testers, max(previous["testers"], 0))
+    if len(testers) != previous["testers"] or coordinate_to_tuple(BAR_ANCHOR)[0] not in anchored:
+        _replace_chart(summary_ws, BAR_ANCHOR, _bar_chart(summary_ws, len(testers)))
+
+    _save_counters(book, counters)
+    return counters
@@ -0,0 +1,184 @@
+import numpy as np
+
+COMPLETED = "completed"
+AVAILABLE = "available"
+LOCKED = "locked"
+STATUSES = (COMPLETED, AVAILABLE, LOCKED)  # codes 0, 1, 2 of TaskIndex.status; -1 is no plan
+RESULTS = ("Pass", "Fail", "Hold")  # codes 1-3 of TaskIndex.result_codes; 0 is no result, 4 any other
+MAX_PARENT_DIGITS = 12
+MAX_SUBTASK_DIGITS = 6
+SUBTASK_LIMIT = 10 ** MAX_SUBTASK_DIGITS  # integer key of "3.2" is 3 * SUBTASK_LIMIT + 2
+
+
+def canonical_id(task_id):
+    """Canonical string form of a Task ID: 2, 2.0 and "2.0" all become "2"; 2.1 stays "2.1" """
+    try:
+        value = float(task_id)
+    except (TypeError, ValueError):
+        return str(task_id).strip()
+    return str(int(value)) if value.is_integer() else str(task_id).strip()
+
+
+def _integer_key(canonical):
+    """Integer key of a canonical "N" or "N.M" Task ID, or None for any other form"""
+    parent, dot, sub = canonical.partition(".")
+    if not (canonical.isascii() and parent.isdigit() and (sub.isdigit() or not dot)):
+        return None
+    # Leading zeros would collide ("2.01" with "2.1") although the canonical IDs differ
+    if (len(parent) > 1 and parent[0] == "0") or (len(sub) > 1 and sub[0] == "0"):
+        return None
+    if len(parent) > MAX_PARENT_DIGITS or len(sub) > MAX_SUBTASK_DIGITS:
+        return None
+    return int(parent) * SUBTASK_LIMIT + int(sub or 0)
+
+
+def _integer_keys(canonical):
+    """_integer_key() of many IDs at once, parsed over the code points of a numpy string array; -1 for None"""
+    ids = np.array(canonical, dtype=str)
+    width = ids.dtype.itemsize // 4
+    if not len(ids) or not width:
+        return np.full(len(ids), -1, dtype=np.int64)
+    points = ids.view(np.uint32).reshape(len(ids), width)
+    digits = (points >= 48) & (points <= 57)
+    dots = points == 46
+    length = (points != 0).sum(axis=1)
+    has_dot = dots.any(axis=1)
+    dot_at = np.where(has_dot, dots.argmax(axis=1), length)
+    sub_length = np.where(has_dot, length - dot_at - 1, 0)
+    rows = np.arange(len(ids))
+    valid = (
+        (digits | dots | (points == 0)).all(axis=1) & (dots.sum(axis=1) <= 1)
+        & (dot_at >= 1) & (dot_at <= MAX_PARENT_DIGITS) & (sub_length <= MAX_SUBTASK_DIGITS)
+        & (has_dot <= (sub_length >= 1))
+        & ~((dot_at > 1) & (points[:, 0] == 48))
+        & ~((sub_length > 1) & (points[rows, np.minimum(dot_at + 1, width - 1)] == 48))
+    )
+    values = np.where(digits, points.astype(np.int64) - 48, 0)
+    parents = np.zeros(len(ids), dtype=np.int64)
+    subs = np.zeros(len(ids), dtype=np.int64)
+    for column in range(width):
+        in_parent = column < dot_at
+        in_sub = (column > dot_at) & (column < length)
+        parents = np.where(in_parent, parents * 10 + values[:, column], parents)
+        subs = np.where(in_sub, subs * 10 + values[:, column], subs)
+    return np.where(valid, parents * SUBTASK_LIMIT + subs, -1)
+
+
+class TaskIndex:
+    """Columnar lookups over Sheet1 built once per workbook version.
+
+    Each row is reduced to numpy arrays: an integer key of its canonical Task
+    ID (parent * SUBTASK_LIMIT + subtask), the code of its tester among the
+    sorted tester names and the code of its result. Each tester's plan is
+    precomputed as row positions sorted by (tester, Task ID) with an
+    enum-coded status per row, so lookups are binary searches and a plan is
+    one slice; nothing is copied per query.
+    """
+
+    def __init__(self, df):
+        column = lambda name: df[name].tolist() if name in df.columns else [None] * len(df)
+        self.df = df
+        task_ids = df["Task ID"].tolist()
+        self._build(task_ids, [canonical_id(tid) for tid in task_ids], column("Tester Name"), column("Test Result"))
+
+    @classmethod
+    def from_columns(cls, task_ids, task_keys, tester_names, test_results):
+        """Index plain columns (task_keys are canonical IDs); record() needs the DataFrame form"""
+        index = cls.__new__(cls)
+        index.df = None
+        index._build(task_ids, task_keys, tester_names, test_results)
+        return index
+
+    def _build(self, task_ids, canonical, testers, results):
+        self.task_ids = np.array([str(tid) for tid in task_ids], dtype=str)
+        self.keys = _integer_keys(canonical)
+        # IDs that are not "N" or "N.M" get negative keys of their own
+        self._other_keys = {}
+        for position in np.flatnonzero(self.keys < 0).tolist():
+            self.keys[position] = self._other_keys.setdefault(canonical[position], -1 - len(self._other_keys))
+
+        # Interned keys: sorted unique keys and the position of their first row
+        order = np.argsort(self.keys, kind="stable")
+        sorted_keys = self.keys[order]
+        first = np.ones(len(sorted_keys), dtype=bool)
+        first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        self._unique_keys = sorted_keys[first]
+        self._first_positions = order[first]
+        key_codes = np.searchsorted(self._unique_keys, self.keys)
+
+        self.testers = sorted({tester for tester in testers if tester is not None and tester == tester})
+        self._tester_pos = {name: code for code, name in enumerate(self.testers)}
+        self.tester_codes = np.array([self._tester_pos.get(tester, -1) for tester in testers], dtype=np.int32)
+        result_pos = {result: code for code, result in enumerate(RESULTS, start=1)}
+        self.result_codes = np.array([
+            0 if result is None or result != result else result_pos.get(result, len(RESULTS) + 1)
+            for result in results
+        ], dtype=np.int8)
+
+        # A Task ID is completed when any of its rows has a result
+        done_keys = np.bincount(key_codes, weights=self.result_codes > 0, minlength=len(self._unique_keys)) > 0
+        row_done = done_keys[key_codes]
+
+        # Plans: each tester's rows by Task ID text, first row per Task ID. A task is available
+        # when it is the tester's first one or the one before it is completed; else locked.
+        rows = np.flatnonzero(self.tester_codes >= 0)
+        rows = rows[np.lexsort((self.task_ids[rows], self.tester_codes[rows]))]
+        codes, ids = self.tester_codes[rows], self.task_ids[rows]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])
+        rows, codes = rows[keep], codes[keep]
+        done = row_done[rows]
+        previous_done = np.ones(len(rows), dtype=bool)
+        previous_done[1:] = done[:-1] | (codes[1:] != codes[:-1])
+        self._plan_rows = rows
+        self._plan_bounds = np.searchsorted(codes, np.arange(len(self.testers) + 1))
+        self.status = np.full(len(self.keys), -1, dtype=np.int8)
+        self.status[rows] = np.where(done, 0, np.where(previous_done, 1, 2))
+        self._plans = {}
+
+    def _key(self, task_id):
+        cid = canonical_id(task_id)
+        key = _integer_key(cid)
+        return self._other_keys.get(cid) if key is None else key
+
+    def position(self, task_id):
+        """0-based DataFrame position of a task, or None"""
+        key = self._key(task_id)
+        i = np.searchsorted(self._unique_keys, key) if key is not None else len(self._unique_keys)
+        if i == len(self._unique_keys) or self._unique_keys[i] != key:
+            return None
+        return int(self._first_positions[i])
+
+    def sheet_row(self, task_id):
+        """Sheet1 row of a task, assuming no blank rows above it (callers verify)"""
+        position = self.position(task_id)
+        return None if position is None else position + 2
+
+    def record(self, task_id):
+        position = self.position(task_id)
+        return None if position is None else self.df.iloc[position]
+
+    def status_counts(self, tester_name=None):
+        """{status: number of planned tasks}, for one tester or everyone"""
+        status = self.status
+        if tester_name is not None:
+            code = self._tester_pos.get(tester_name)
+            if code is None:
+                return dict.fromkeys(STATUSES, 0)
+            status = status[self._plan_rows[self._plan_bounds[code]:self._plan_bounds[code + 1]]]
+        counts = np.bincount(status[status >= 0], minlength=len(STATUSES))
+        return {name: int(count) for name, count in zip(STATUSES, counts)}
+
+    def tester_plan(self, tester_name):
+        """[(task_id, status)] for a tester, sorted by Task ID.
+
+        A task is available when it is the first one or the one before it is
+        completed; anything else that is not completed is locked.
+        """
+        plan = self._plans.get(tester_name)
+        if plan is None:
+            code = self._tester_pos.get(tester_name)
+            rows = self._plan_rows[self._plan_bounds[code]:self._plan_bounds[code + 1]] if code is not None else []
+            plan = [(tid, STATUSES[status]) for tid, status in zip(self.task_ids[rows].tolist(), self.status[rows].tolist())]
+            self._plans[tester_name] = plan
+        return plan
@@ -0,0 +1,327 @@
+import json
+import sqlite3
+import weakref
+import threading
+from task_index import TaskIndex, canonical_id
+from workbook import LazyWorkbook
+from perf import span, timed
+
+TASK_STORE_SUFFIX = ".tasks.sqlite"
+SEARCH_COLUMNS = ("task_id", "task_name", "navigation")
+MIN_FTS_TERM = 3  # trigram tokenizer needs at least three characters
+
+# Sheet1 header -> tasks column; any other header is kept in the "extra" JSON column
+COLUMNS = {
+    "Task ID": "task_id",
+    "Task Name": "task_name",
+    "Navigation": "navigation",
+    "Parameters": "parameters",
+    "Tester Name": "tester_name",
+    "Test Result": "test_result",
+    "Timestamp": "timestamp",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    position INTEGER PRIMARY KEY,
+    task_key TEXT NOT NULL,
+    task_id TEXT,
+    task_name TEXT,
+    navigation TEXT,
+    parameters TEXT,
+    tester_name TEXT,
+    test_result TEXT,
+    timestamp TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_task_key ON tasks (task_key);
+CREATE INDEX IF NOT EXISTS tasks_tester_name ON tasks (tester_name);
+CREATE INDEX IF NOT EXISTS tasks_test_result ON tasks (test_result);
+CREATE INDEX IF NOT EXISTS tasks_timestamp ON tasks (timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5({', '.join(SEARCH_COLUMNS)}, tokenize='trigram')
+"""
+
+
+def _cell_text(value):
+    """Cell value as stored text; NaN/None become NULL and datetimes use the sheet's format"""
+    if value is None or value != value:  # NaN
+        return None
+    if hasattr(value, "strftime"):  # datetime and pd.Timestamp
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+class TaskStore:
+    """SQLite copy of Sheet1 that the app queries instead of parsing the xlsx.
+
+    Rows keep their Sheet1 order (position) and are indexed on Task ID,
+    Tester Name, Test Result and Timestamp, so per-page reads cost the same
+    however many tasks there are. Importing the xlsx is an explicit operation;
+    afterwards the submission engine applies each journaled submit directly.
+    Tester plans and lock status come from a columnar TaskIndex built once
+    per version for all sessions (index()).
+    Every change bumps a version counter that derived data is memoized on,
+    and once committed sets the events handed out by subscribe(), so every
+    session sharing the store hears about it.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+        self._subscribers = weakref.WeakSet()
+        self._subscribers_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            try:
+                conn.execute(FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5/trigram: search falls back to LIKE scans
+                self.full_text = False
+        if self.full_text and self.count() and not self._connect().execute("SELECT COUNT(*) FROM tasks_fts").fetchone()[0]:
+            with self._connect() as conn:
+                self._rebuild_search(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- metadata --------------------------------------------------------------
+
+    def meta(self, key, default=None):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump(self, conn):
+        self._set_meta(conn, "version", int(self.meta("version", 0)) + 1)
+
+    def version(self):
+        return int(self.meta("version", 0))
+
+    def subscribe(self):
+        """threading.Event set after every committed change; held weakly, so it lapses with its subscriber"""
+        event = threading.Event()
+        with self._subscribers_lock:
+            self._subscribers.add(event)
+        return event
+
+    def _publish(self):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for event in subscribers:
+            event.set()
+
+    # --- import / updates ------------------------------------------------------
+
+    @timed("task_store.import")
+    def import_workbook(self, excel_path, source_digest=None, **meta):
+        """Replace every task with Sheet1 of the xlsx at excel_path"""
+        df = LazyWorkbook(excel_path).read_dataframe("Sheet1")
+        df["Task ID"] = df["Task ID"].astype(str).str.strip()
+        extra_columns = [col for col in df.columns if col not in COLUMNS]
+        rows = []
+        for position, record in enumerate(df.to_dict("records")):
+            extra = {col: _cell_text(record[col]) for col in extra_columns}
+            rows.append((
+                position,
+                canonical_id(record["Task ID"]),
+                *(_cell_text(record.get(header)) for header in COLUMNS),
+                json.dumps(extra) if extra else None,
+            ))
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM tasks")
+            conn.executemany(
+                f"INSERT INTO tasks (position, task_key, {', '.join(COLUMNS.values())}, extra) "
+                f"VALUES ({', '.join('?' * (len(COLUMNS) + 3))})",
+                rows,
+            )
+            self._rebuild_search(conn)
+            self._set_meta(conn, "columns", json.dumps([str(col) for col in df.columns]))
+            self._set_meta(conn, "source_digest", source_digest or "")
+            for key, value in meta.items():
+                self._set_meta(conn, key, value)
+            self._bump(conn)
+        self._publish()
+        return len(rows)
+
+    def _rebuild_search(self, conn):
+        """Refill the full-text index; only imports change the searched columns"""
+        if not self.full_text:
+            return
+        conn.execute("DELETE FROM tasks_fts")
+        conn.execute(
+            f"INSERT INTO tasks_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+            f"SELECT position, {', '.join(SEARCH_COLUMNS)} FROM tasks"
+        )
+
+    def apply(self, submission, **meta):
+        """Record one submission's result on its task (the first row with that Task ID)"""
+        self.apply_many([submission], **meta)
+
+    def apply_many(self, submissions, **meta):
+        """Record several submissions, in order, in one transaction"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE tasks SET tester_name = ?, test_result = ?, timestamp = ? "
+                "WHERE position = (SELECT MIN(position) FROM tasks WHERE task_key = ?)",
+                [(submission.tester_name, submission.test_result, submission.created,
+                  canonical_id(submission.task_id)) for submission in submissions],
+            )
+            for key, value in meta.items():
+                self._set_meta(conn, key, value)
+            self._bump(conn)
+        self._publish()
+
+    def set_meta(self, **meta):
+        conn = self._connect()
+        with conn:
+            for key, value in meta.items():
+                self._set_meta(conn, key, value)
+
+    # --- queries ---------------------------------------------------------------
+
+    def _where(self, tester_name=None, search=None):
+        where, params = [], []
+        if tester_name is not None:
+            where.append("tester_name = ?")
+            params.append(tester_name)
+        if search and search.strip():
+            clause, search_params = self._search_clause(search.strip())
+            where.append(clause)
+            params += search_params
+        return (f" WHERE {' AND '.join(where)}" if where else ""), params
+
+    def count(self, tester_name=None, search=None):
+        """Number of tasks, optionally only one tester's and/or those matching a search"""
+        where_sql, params = self._where(tester_name, search)
+        return self._connect().execute(f"SELECT COUNT(*) FROM tasks{where_sql}", params).fetchone()[0]
+
+    def task_ids(self):
+        """Task IDs in sheet order"""
+        return [row[0] for row in self._connect().execute("SELECT task_id FROM tasks ORDER BY position")]
+
+    def testers(self):
+        return self.index().testers
+
+    def _index_columns(self):
+        rows = self._connect().execute(
+            "SELECT task_id, task_key, tester_name, test_result FROM tasks ORDER BY position"
+        ).fetchall()
+        return [list(column) for column in zip(*rows)] or [[], [], [], []]
+
+    def index(self):
+        """Columnar TaskIndex of every task, built once per version and shared by all sessions"""
+        return self.derived("task_index", lambda columns: TaskIndex.from_columns(*columns), self._index_columns)
+
+    def tester_plan(self, tester_name):
+        """[(task_id, status)] for a tester, sorted by Task ID (see TaskIndex.tester_plan)"""
+        return self.index().tester_plan(tester_name)
+
+    def status_counts(self, tester_name=None):
+        """{status: number of planned tasks}, for one tester or everyone"""
+        return self.index().status_counts(tester_name)
+
+    def columns(self):
+        """Sheet1 headers, in sheet order"""
+        return json.loads(self.meta("columns", json.dumps(list(COLUMNS))))
+
+    def _to_records(self, rows):
+        records = []
+        for row in rows:
+            record = dict(zip(COLUMNS, row[:len(COLUMNS)]))
+            if row[len(COLUMNS)]:
+                record.update(json.loads(row[len(COLUMNS)]))
+            records.append(record)
+        return records
+
+    def record(self, task_id):
+        """Sheet1 row of a task as {header: value}, or None"""
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS.values())}, extra FROM tasks WHERE task_key = ? ORDER BY position LIMIT 1",
+            (canonical_id(task_id),),
+        ).fetchone()
+        return None if row is None else self._to_records([row])[0]
+
+    def dataframe(self, tester_name=None):
+        """Sheet1 as a DataFrame (optionally one tester's rows), in sheet order"""
+        import pandas as pd
+        query = f"SELECT {', '.join(COLUMNS.values())}, extra FROM tasks"
+        params = ()
+        if tester_name is not None:
+            query += " WHERE tester_name = ?"
+            params = (tester_name,)
+        rows = self._connect().execute(query + " ORDER BY position", params).fetchall()
+        return pd.DataFrame(self._to_records(rows), columns=self.columns())
+
+    def _search_clause(self, search):
+        if self.full_text and len(search) >= MIN_FTS_TERM:
+            return "position IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)", ['"' + search.replace('"', '""') + '"']
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clause = " OR ".join(f"{col} LIKE ? ESCAPE '\\'" for col in SEARCH_COLUMNS)
+        return f"({clause})", [pattern] * len(SEARCH_COLUMNS)
+
+    @timed("task_store.page")
+    def page(self, columns=None, tester_name=None, search=None, sort_by=None, descending=False, offset=0, limit=50):
+        """(DataFrame of one window of Sheet1, number of matching rows).
+
+        Filtering, sorting and slicing run in SQLite and only the requested
+        columns of the visible rows are read. search matches Task ID, Task Name
+        and Navigation case-insensitively, through the trigram full-text index
+        for 3+ characters. sort_by is a header name; None keeps sheet order.
+        The DataFrame is indexed by the rows' 0-based Sheet1 positions.
+        """
+        import pandas as pd
+        total = self.count(tester_name, search)
+        where_sql, params = self._where(tester_name, search)
+        headers = self.columns()
+        columns = [col for col in columns or headers if col in headers]
+        selected = [COLUMNS[col] for col in columns if col in COLUMNS]
+        extra_columns = [col for col in columns if col not in COLUMNS]
+        direction = "DESC" if descending else "ASC"
+        if sort_by == "Task ID":
+            order = f"CAST(task_id AS REAL) {direction}, task_id {direction}"
+        elif sort_by in COLUMNS:
+            order = f"{COLUMNS[sort_by]} IS NULL, {COLUMNS[sort_by]} {direction}"
+        else:
+            order = f"position {direction}"
+        rows = self._connect().execute(
+            f"SELECT {', '.join(['position', *selected, 'extra' if extra_columns else 'NULL'])} "
+            f"FROM tasks{where_sql} ORDER BY {order}, position LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+        records = []
+        for row in rows:
+            record = dict(zip((col for col in columns if col in COLUMNS), row[1:-1]))
+            if row[-1]:
+                record.update(json.loads(row[-1]))
+            records.append(record)
+        return pd.DataFrame(records, columns=columns, index=[row[0] for row in rows]), total
+
+    def derived(self, name, build, source=None):
+        """build(DataFrame of all tasks, or source() when given), memoized until the store changes"""
+        version = self.version()
+        with self._derived_lock:
+            cached = self._derived.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        with span(f"derived.{name}"):
+            value = build(self.dataframe() if source is None else source())
+        with self._derived_lock:
+            self._derived[name] = (version, value)
+        return value
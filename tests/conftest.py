@@ -0,0 +1,50 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import make_synthetic_workbook
+from image_store import ImageStore
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    """Three tasks with two subtasks each and one screenshot per task sheet"""
+    path = str(tmp_path / "main_excel.xlsx")
+    make_synthetic_workbook(path, tasks=3, images_per_task=1, image_size=(40, 30))
+    return path
+
+
+@pytest.fixture
+def image_store(tmp_path):
+    return ImageStore(str(tmp_path / "screenshots"))
+
+
+@pytest.fixture
+def engine_factory(image_store):
+    """SubmissionEngine with the background compactor held off, so tests compact explicitly"""
+    from submissions import SubmissionEngine
+
+    def make(excel_path, remote=None, **options):
+        if remote is not None:
+            options.setdefault("batch_window", 0)
+            options.setdefault("backoff", 0)
+        options.setdefault("compact_delay", 3600)
+        options.setdefault("compact_interval", 3600)
+        return SubmissionEngine(excel_path, remote, store=image_store, **options)
+    return make
+
+
+@pytest.fixture
+def github():
+    """A running FakeGitHub with an empty branch"""
+    from fake_github import FakeGitHub
+    with FakeGitHub() as server:
+        yield server
+
+
+@pytest.fixture
+def github_client(github):
+    from github_client import GitHubClient
+    return GitHubClient("owner/repo", "token", api_url=github.url)
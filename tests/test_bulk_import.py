@@ -0,0 +1,111 @@
+import io
+import zipfile
+import openpyxl
+import pytest
+from PIL import Image
+from bulk_import import validate_results, import_results
+from github_sync import RemoteWorkbook
+from section_index import load_sections
+from submissions import Submission, apply_submissions
+from test_submissions import sheet1_results
+from workbook import LazyWorkbook, sheet_images
+
+RESULTS_CSV = """Task ID,Tester Name,Test Result,Comment,Timestamp,Screenshots
+1.1,Paul,Fail,Login button missing,2026-01-02 10:00:00,a.png;b.png
+2.2,John,Hold,,2026-01-02 11:00:00,c.png
+3.1,Anmol,Pass,,2026-01-03 09:30:00,
+"""
+
+
+def test_timestamps_are_validated_and_normalized():
+    rows = [
+        {"task_id": "1.1", "tester_name": "Paul", "test_result": "Pass", "timestamp": "2025-5-4 1:02:03"},
+        {"task_id": "1.2", "tester_name": "Paul", "test_result": "Pass", "timestamp": "yesterday"},
+    ]
+    with pytest.raises(ValueError, match=r"row 2: Timestamp 'yesterday'") as error:
+        validate_results(rows, {"1.1", "1.2"})
+    assert "row 1" not in str(error.value)
+
+    validate_results(rows[:1], {"1.1"})
+    assert rows[0]["timestamp"] == "2025-05-04 01:02:03"
+
+
+@pytest.fixture
+def results(tmp_path):
+    shots = tmp_path / "shots"
+    shots.mkdir()
+    for seed, name in enumerate(("a.png", "b.png", "c.png")):
+        Image.new("RGB", (40, 30), (seed * 80, 90, 160)).save(shots / name)
+    path = tmp_path / "results.csv"
+    path.write_text(RESULTS_CSV, encoding="utf-8")
+    return str(path), str(shots)
+
+
+def block_images(content, sheet_name, block):
+    """Number of pictures anchored inside one evidence block of a task sheet (up to the next block)"""
+    sections = load_sections(openpyxl.load_workbook(io.BytesIO(content)), sheet_name)
+    start = sections[block][0]
+    end = min([rows[0] for rows in sections.values() if rows[0] > start], default=float("inf"))
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        return sum(start <= row < end for row, _ in sheet_images(zf, sheet_name))
+
+
+def test_import_applies_the_batch_in_one_save(workbook_path, image_store, results, monkeypatch):
+    saves = []
+    save = LazyWorkbook.save
+    monkeypatch.setattr(LazyWorkbook, "save", lambda self, target: saves.append(target) or save(self, target))
+
+    submissions = import_results(*results[:1], workbook_path, results[1], image_store)
+
+    assert len(saves) == 1
+    assert [submission.task_id for submission in submissions] == ["1.1", "2.2", "3.1"]
+    sheet1 = openpyxl.load_workbook(workbook_path)["Sheet1"]
+    rows = {row[0]: row[4:] for row in sheet1.iter_rows(min_row=2, values_only=True)}
+    assert rows["1.1"] == ("Paul", "Fail", "2026-01-02 10:00:00")
+    assert rows["2.2"] == ("John", "Hold", "2026-01-02 11:00:00")
+    assert rows["3.1"] == ("Anmol", "Pass", "2026-01-03 09:30:00")
+
+    with open(workbook_path, "rb") as f:
+        content = f.read()
+    assert block_images(content, "Task ID 1", "Task 1.1") == 2
+    assert block_images(content, "Task ID 2", "Task 2.2") == 1
+    assert block_images(content, "Task ID 3", "Task 3.1") == 0
+    assert block_images(content, "Task ID 1", "Task 1") == 1
+    task_sheet = [row[:2] for row in openpyxl.load_workbook(workbook_path)["Task ID 1"].iter_rows(values_only=True)]
+    assert ("Comment", "Login button missing") in task_sheet
+
+    summary = dict(openpyxl.load_workbook(workbook_path)["Summary"].iter_rows(max_row=7, max_col=2, values_only=True))
+    assert (summary["Pass"], summary["Fail"], summary["Hold"]) == (4, 1, 1)
+    assert summary["Last Updated Task ID"] == "3.1"
+
+
+def test_import_is_reapplied_when_the_branch_moves(tmp_path, workbook_path, image_store, results, github,
+                                                   github_client):
+    path = "main_excel.xlsx"
+    remote = RemoteWorkbook(github_client, path)
+    with open(workbook_path, "rb") as f:
+        remote.push(f.read(), "Seed", None)
+    # Someone else commits between the import's first fetch and its push, which is refused with a 409
+    moved = str(tmp_path / "moved.xlsx")
+    fetch = remote.fetch
+
+    def fetch_then_move():
+        content, version = fetch()
+        if github.commit_messages == ["Seed"]:
+            with open(moved, "wb") as f:
+                f.write(content)
+            github.set_file(path, apply_submissions(moved, [Submission("1.2", "Vaishnavi", "Pass", "", [])],
+                                                    image_store))
+            github.fail_next(409, method="PUT")
+        return content, version
+    remote.fetch = fetch_then_move
+
+    import_results(results[0], str(tmp_path / "work.xlsx"), results[1], image_store, remote, message="Import run 1")
+
+    assert github.commit_messages == ["Seed", "External change", "Import run 1"]
+    branch = str(tmp_path / "branch.xlsx")
+    with open(branch, "wb") as f:
+        f.write(github.files[path])
+    outcome = sheet1_results(branch)
+    assert (outcome["1.2"], outcome["1.1"], outcome["2.2"], outcome["3.1"]) == ("Pass", "Fail", "Hold", "Pass")
+    assert block_images(github.files[path], "Task ID 1", "Task 1.1") == 2
@@ -0,0 +1,90 @@
+import io
+import csv
+import zipfile
+from datetime import date
+import openpyxl
+import pytest
+from PIL import Image
+from export import export_bytes
+from section_index import BLOCK_LABELS
+from submissions import Submission, apply_submissions
+from utils import write_local_workbook
+from workbook import sheet_images
+
+
+def png(seed):
+    bio = io.BytesIO()
+    Image.new("RGB", (40, 30), (seed * 60 % 256, 90, 160)).save(bio, format="PNG")
+    return bio.getvalue()
+
+
+@pytest.fixture
+def evidence_path(workbook_path, image_store):
+    """The synthetic workbook with subtask blocks: 1.1 (two screenshots), 2.1 (one) and 3.1 (none)"""
+    write_local_workbook(workbook_path, apply_submissions(workbook_path, [
+        Submission("1.1", "Paul", "Fail", "", [image_store.put(png(1)), image_store.put(png(2))],
+                   created="2026-01-02 10:00:00"),
+        Submission("2.1", "John", "Hold", "", [image_store.put(png(3))], created="2026-01-03 10:00:00"),
+        Submission("3.1", "Paul", "Pass", "", [], created="2026-01-04 10:00:00"),
+    ], image_store))
+    return workbook_path
+
+
+def xlsx_blocks(content):
+    """(Sheet1 Task IDs, {sheet: {block text: image count}}) of an exported xlsx"""
+    wb = openpyxl.load_workbook(io.BytesIO(content))
+    task_ids = [str(row[0]) for row in wb["Sheet1"].iter_rows(min_row=2, values_only=True)]
+    blocks = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        for name in wb.sheetnames[1:]:
+            starts = {label.row: text.value for label, text in wb[name].iter_rows(max_col=2)
+                      if label.value in BLOCK_LABELS}
+            counts = dict.fromkeys(starts.values(), 0)
+            for row, _ in sheet_images(zf, name):
+                counts[starts[max(start for start in starts if start <= row)]] += 1
+            blocks[name] = counts
+    return task_ids, blocks
+
+
+def zip_blocks(content):
+    """(Sheet1 Task IDs, {sheet: {block text: screenshot count}}) of an exported zip"""
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        assert zf.testzip() is None
+        task_ids = [row[0] for row in list(csv.reader(io.StringIO(zf.read("results.csv").decode())))[1:]]
+        blocks = {}
+        for name in zf.namelist():
+            sheet, _, member = name.partition("/")
+            if member == "evidence.csv":
+                rows = csv.reader(io.StringIO(zf.read(name).decode()))
+                blocks.setdefault(sheet, {}).update({row[2]: 0 for row in rows if row[1] in BLOCK_LABELS})
+        for name in zf.namelist():
+            parts = name.split("/")
+            if len(parts) == 3:
+                blocks[parts[0]][parts[1]] += 1
+    return task_ids, blocks
+
+
+@pytest.mark.parametrize("fmt, read", [("xlsx", xlsx_blocks), ("zip", zip_blocks)])
+def test_tester_filter_exports_only_their_rows_and_blocks(evidence_path, fmt, read):
+    task_ids, blocks = read(export_bytes(evidence_path, fmt, tester_name="Paul"))
+
+    sheet1 = openpyxl.load_workbook(evidence_path)["Sheet1"]
+    assert task_ids == [str(row[0]) for row in sheet1.iter_rows(min_row=2, values_only=True) if row[4] == "Paul"]
+    # Task 2 is Paul's parent task with one screenshot; 2.1 went to John and 2.2 has no block
+    assert blocks == {
+        "Task ID 1": {"Task 1.1": 2},
+        "Task ID 2": {"Task 2": 1},
+        "Task ID 3": {"Task 3.1": 0},
+    }
+
+
+@pytest.mark.parametrize("fmt, read", [("xlsx", xlsx_blocks), ("zip", zip_blocks)])
+def test_task_sheet_and_date_filters(evidence_path, fmt, read):
+    content = export_bytes(evidence_path, fmt, task_sheet="Task ID 1", start=date(2026, 1, 1), end=date(2026, 1, 2))
+    assert read(content) == (["1.1"], {"Task ID 1": {"Task 1.1": 2}})
+
+
+@pytest.mark.parametrize("fmt, read", [("xlsx", xlsx_blocks), ("zip", zip_blocks)])
+def test_date_range_without_matches_is_empty(evidence_path, fmt, read):
+    content = export_bytes(evidence_path, fmt, start=date(2030, 1, 1), end=date(2030, 12, 31))
+    assert read(content) == ([], {})
@@ -0,0 +1,123 @@
+import time
+import shutil
+import pytest
+from github_sync import SyncWorker, RemoteWorkbook, TRANSPORTS
+from submissions import Submission
+from test_submissions import sheet1_results
+
+PATH = "main_excel.xlsx"
+
+
+def uploader(client):
+    return lambda content, message: client.put_file(PATH, content, message)
+
+
+def test_burst_is_coalesced_into_one_commit_of_the_newest_snapshot(github, github_client):
+    worker = SyncWorker(uploader(github_client), batch_window=0.5, backoff=0)
+    for n in range(1, 4):
+        worker.submit(b"v%d" % n, f"update {n}")
+    assert worker.wait(10)
+
+    assert github.files[PATH] == b"v3"
+    assert github.commit_messages == ["3 updates: update 1; update 2; update 3"]
+    status = worker.status()
+    assert (status["state"], status["pending"], status["commits"]) == ("idle", 0, 1)
+
+
+def test_transient_errors_are_retried(github, github_client):
+    github.fail_next(502, count=2, method="PUT")
+    worker = SyncWorker(uploader(github_client), batch_window=0, backoff=0)
+    worker.submit(b"v1", "update")
+    assert worker.wait(10)
+
+    assert github.files[PATH] == b"v1"
+    assert github.commit_messages == ["update"]
+    assert worker.status()["state"] == "idle"
+
+
+def test_conflict_rebases_once_then_retries(github, github_client):
+    github.set_file(PATH, b"v0")
+    rebases = []
+    worker = SyncWorker(uploader(github_client), batch_window=0, backoff=0, rebase=lambda: rebases.append(1))
+    github.fail_next(409, method="PUT")
+    worker.submit(b"v1", "update")
+    assert worker.wait(10)
+
+    assert rebases == [1]
+    assert github.files[PATH] == b"v1"
+    assert worker.status()["commits"] == 1
+
+
+def test_failures_end_in_the_error_status(github, github_client):
+    worker = SyncWorker(uploader(github_client), batch_window=0, backoff=0, max_retries=2)
+    github.fail_next(403, method="PUT")
+    worker.submit(b"v1", "forbidden")
+    assert worker.wait(10)
+    status = worker.status()
+    assert (status["state"], status["pending"], status["commits"]) == ("error", 0, 0)
+    assert "403" in status["last_error"]
+
+    # Retries are bounded: max_retries + 1 attempts, then the error is reported
+    github.fail_next(503, count=3, method="PUT")
+    worker.submit(b"v2", "unavailable")
+    assert worker.wait(10)
+    assert worker.status()["state"] == "error" and "503" in worker.status()["last_error"]
+    assert PATH not in github.files
+
+    # The next snapshot goes through and clears the error
+    worker.submit(b"v3", "recovered")
+    assert worker.wait(10)
+    status = worker.status()
+    assert (status["state"], status["last_error"], status["commits"]) == ("idle", None, 1)
+    assert github.files[PATH] == b"v3"
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_two_engines_on_one_branch_keep_both_results(transport, tmp_path, workbook_path, engine_factory,
+                                                      github, github_client):
+    seed = RemoteWorkbook(github_client, PATH, transport)
+    with open(workbook_path, "rb") as f:
+        seed.push(f.read(), "Seed", None)
+    engines = []
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        local = str(tmp_path / name / PATH)
+        shutil.copy(workbook_path, local)
+        engines.append(engine_factory(local, RemoteWorkbook(github_client, PATH, transport)))
+    first, second = engines
+
+    first.submit(Submission("1.1", "Vaishnavi", "Fail", "", []))
+    first.compact()
+    assert first.worker.wait(10)
+    # second still builds on the seed, so its conditional push is refused once
+    second.submit(Submission("2.1", "John", "Hold", "", []))
+    second.compact()
+    assert second.worker.wait(10)
+
+    assert (first.rebases, second.rebases) == (0, 1)
+    assert second.worker.status()["state"] == "idle"
+    content, version = RemoteWorkbook(github_client, PATH, transport).fetch()
+    assert version == second.base_version
+    branch = str(tmp_path / "branch.xlsx")
+    with open(branch, "wb") as f:
+        f.write(content)
+    results = sheet1_results(branch)
+    assert (results["1.1"], results["2.1"]) == ("Fail", "Hold")
+
+
+
+def test_compactor_pushes_again_after_the_worker_gives_up(workbook_path, engine_factory, github, github_client):
+    github.fail_next(503, count=2, method="PUT")
+    engine = engine_factory(workbook_path, RemoteWorkbook(github_client, PATH), max_retries=1,
+                            compact_delay=0, compact_interval=0.05)
+    engine.submit(Submission("1.1", "Paul", "Fail", "", []))
+
+    # The worker gives up after two 503s; no new submission arrives, the compactor's wake-ups retry the push
+    deadline = time.monotonic() + 10
+    while PATH not in github.files and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert engine.worker.wait(10)
+    assert github.commit_messages == ["Sync results that did not reach GitHub"]
+    assert engine.pushed_offset == engine._compacted
+    assert engine.worker.status()["state"] == "idle"
+    assert github.files[PATH] == engine.snapshot()
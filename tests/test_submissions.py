@@ -0,0 +1,77 @@
+import os
+import pytest
+from submissions import Submission
+from workbook import LazyWorkbook
+
+
+def sheet1_results(excel_path):
+    rows = LazyWorkbook(excel_path).read_rows("Sheet1", min_row=2, max_col=7)
+    return {str(row[0]): row[5] for row in rows}
+
+
+def test_invalid_submissions_are_rejected_before_journaling(workbook_path, engine_factory):
+    engine = engine_factory(workbook_path)
+    end = len(engine.journal.read())
+    for submission in [
+        Submission("2.1", "Paul", "Pass", "", [], created="yesterday"),
+        Submission("99.1", "Paul", "Pass", "", []),
+        Submission("2.1", "Paul", "Maybe", "", []),
+        Submission("2.1", "Paul", "Pass", "", ["0" * 64]),
+    ]:
+        with pytest.raises(ValueError):
+            engine.submit(submission)
+    with pytest.raises(ValueError, match="99.2"):
+        engine.submit_batch([Submission("1.1", "Paul", "Pass", "", []), Submission("99.2", "Paul", "Pass", "", [])])
+    assert len(engine.journal.read()) == end
+
+
+def test_entry_that_fails_to_apply_is_quarantined(workbook_path, engine_factory):
+    engine = engine_factory(workbook_path)
+    # Journaled without the submit-time check, e.g. by an older version of the app
+    engine.journal.append(Submission("2.1", "Paul", "Pass", "", [], created="yesterday").to_dict())
+    engine.journal.append(Submission("2.2", "Paul", "Pass", "", ["0" * 64]).to_dict())
+    engine.submit(Submission("3.1", "John", "Fail", "", []))
+
+    applied = engine.compact()
+
+    assert [submission.task_id for submission in applied] == ["3.1"]
+    results = sheet1_results(workbook_path)
+    assert results["3.1"] == "Fail"
+    assert results["2.1"] is None and results["2.2"] is None
+    assert [item["entry"]["task_id"] for item in engine.quarantined()] == ["2.1", "2.2"]
+    assert engine.tasks.record("2.1")["Test Result"] is None
+    assert engine.tasks.record("3.1")["Test Result"] == "Fail"
+    assert engine.compact() == []
+
+    # Later entries keep flowing, and a restart does not retry the quarantined ones
+    engine.submit(Submission("1.1", "Vaishnavi", "Hold", "", []))
+    assert [submission.task_id for submission in engine.compact()] == ["1.1"]
+    restarted = engine_factory(workbook_path)
+    assert restarted.compact() == []
+    assert len(restarted.quarantined()) == 2
+    assert sheet1_results(workbook_path)["1.1"] == "Hold"
+
+
+def test_unreadable_workbook_does_not_quarantine_entries(workbook_path, engine_factory):
+    engine = engine_factory(workbook_path)
+    engine.submit(Submission("1.2", "Paul", "Pass", "", []))
+    engine.submit(Submission("2.1", "John", "Fail", "", []))
+    with open(workbook_path, "rb") as f:
+        original = f.read()
+
+    os.rename(workbook_path, workbook_path + ".moved")
+    with pytest.raises(OSError):
+        engine.compact()
+    os.rename(workbook_path + ".moved", workbook_path)
+    with open(workbook_path, "wb") as f:
+        f.write(b"not a zip file")
+    with pytest.raises(Exception):
+        engine.compact()
+    with open(workbook_path, "wb") as f:
+        f.write(original)
+
+    assert engine.quarantined() == []
+    assert [submission.task_id for submission in engine.compact()] == ["1.2", "2.1"]
+    results = sheet1_results(workbook_path)
+    assert (results["1.2"], results["2.1"]) == ("Pass", "Fail")
+    assert engine.tasks.record("1.2")["Test Result"] == "Pass"
@@ -0,0 +1,59 @@
+import summary
+from openpyxl import load_workbook
+from submissions import Submission, apply_submissions
+from summary import build_counters, load_counters
+
+
+def summary_counts(excel_path):
+    book = load_workbook(excel_path)
+    values = {row[0]: row[1] for row in book["Summary"].iter_rows(min_row=1, max_row=4, max_col=2, values_only=True)}
+    return {result: values[result] for result in ("Pass", "Fail", "Hold")}, load_counters(book), book
+
+
+def apply(excel_path, *submissions):
+    data = apply_submissions(excel_path, list(submissions))
+    with open(excel_path, "wb") as f:
+        f.write(data)
+
+
+def test_counters_follow_submissions_with_a_delta(workbook_path):
+    apply(workbook_path, Submission("1.1", "Paul", "Fail", "", [], created="2026-01-02 10:00:00"))
+    apply(workbook_path, Submission("1.2", "John", "Hold", "", [], created="2026-01-03 10:00:00"),
+          Submission("1.1", "John", "Pass", "", [], created="2026-01-03 11:00:00"))
+
+    counts, counters, book = summary_counts(workbook_path)
+    assert counts == {"Pass": 4, "Fail": 0, "Hold": 1}
+    rebuilt = build_counters(book["Sheet1"])
+    assert {key: counters[key] for key in rebuilt} == rebuilt
+
+
+def test_submit_does_not_scan_sheet1_between_checks(workbook_path, monkeypatch):
+    apply(workbook_path, Submission("1.1", "Paul", "Fail", "", [], created="2026-01-02 10:00:00"))
+    scans = []
+    fingerprint = summary.sheet1_fingerprint
+    monkeypatch.setattr(summary, "sheet1_fingerprint", lambda ws: scans.append(1) or fingerprint(ws))
+
+    apply(workbook_path, Submission("2.1", "John", "Hold", "", [], created="2026-01-03 10:00:00"))
+    assert scans == []
+    monkeypatch.setattr(summary, "VERIFY_INTERVAL", 0)
+    apply(workbook_path, Submission("3.1", "Anmol", "Pass", "", [], created="2026-01-03 11:00:00"))
+    assert scans == [1]
+    counts, counters, book = summary_counts(workbook_path)
+    assert counters["fingerprint"] == f"{fingerprint(book['Sheet1']):016x}"
+
+
+def test_counters_are_rebuilt_after_sheet1_is_edited_elsewhere(workbook_path, monkeypatch):
+    monkeypatch.setattr(summary, "VERIFY_INTERVAL", 0)
+    apply(workbook_path, Submission("1.1", "Paul", "Fail", "", [], created="2026-01-02 10:00:00"))
+
+    # Same row count, different results: only the fingerprint can tell
+    book = load_workbook(workbook_path)
+    for row in (2, 5):
+        book["Sheet1"].cell(row=row, column=6).value = "Hold"
+    book.save(workbook_path)
+    apply(workbook_path, Submission("2.1", "Anmol", "Pass", "", [], created="2026-01-03 10:00:00"))
+
+    counts, counters, book = summary_counts(workbook_path)
+    rebuilt = build_counters(book["Sheet1"])
+    assert counts == {result: rebuilt["results"][result] for result in ("Pass", "Fail", "Hold")}
+    assert {key: counters[key] for key in rebuilt} == rebuilt
@@ -0,0 +1,57 @@
+import random
+import pandas as pd
+from task_index import (TaskIndex, canonical_id, _integer_key, _integer_keys, COMPLETED, AVAILABLE, LOCKED,
+                        MAX_PARENT_DIGITS, MAX_SUBTASK_DIGITS)
+
+EDGE_IDS = [
+    "", "0", "00", "01", "1", "10", "1.", ".5", ".", "..", "1..2", "1.2.3", "1.0", "1.00", "1.01", "1.10",
+    "0.5", "00.5", "2.1", "-1", "+1", " 1", "1 ", "1e3", "abc", "Task 1",
+    "١٢", "1.٣", "１", "²", "1.²", "é",
+    "9" * MAX_PARENT_DIGITS, "9" * (MAX_PARENT_DIGITS + 1), "1." + "9" * MAX_SUBTASK_DIGITS,
+    "1." + "9" * (MAX_SUBTASK_DIGITS + 1), "9" * MAX_PARENT_DIGITS + "." + "9" * MAX_SUBTASK_DIGITS,
+]
+
+
+def expected_keys(ids):
+    return [-1 if key is None else key for key in map(_integer_key, ids)]
+
+
+def test_integer_keys_match_integer_key():
+    assert _integer_keys(EDGE_IDS).tolist() == expected_keys(EDGE_IDS)
+    # The array is padded to its longest ID, so every ID is also checked on its own
+    for task_id in EDGE_IDS:
+        assert _integer_keys([task_id]).tolist() == expected_keys([task_id]), task_id
+    assert _integer_keys([]).tolist() == []
+    assert _integer_keys(["", ""]).tolist() == [-1, -1]
+
+    rng = random.Random(23)
+    alphabet = "0123456789..a٣"
+    ids = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 22))) for _ in range(5000)]
+    assert _integer_keys(ids).tolist() == expected_keys(ids)
+
+
+def reference_plan(df, tester_name):
+    """The plan computed the plain way: the tester's Task IDs sorted as text, one pass over them"""
+    done = {canonical_id(tid) for tid, result in zip(df["Task ID"], df["Test Result"]) if pd.notna(result)}
+    task_ids = sorted(dict.fromkeys(tid for tid, name in zip(df["Task ID"], df["Tester Name"]) if name == tester_name))
+    plan, previous_done = [], True
+    for tid in task_ids:
+        is_done = canonical_id(tid) in done
+        plan.append((tid, COMPLETED if is_done else AVAILABLE if previous_done else LOCKED))
+        previous_done = is_done
+    return plan
+
+
+def test_tester_plan_matches_a_plain_sort():
+    df = pd.DataFrame([
+        ("1", "Paul", "Pass"), ("1.1", "Paul", None), ("1.2", "Paul", None), ("1.10", "Paul", "Fail"),
+        ("2", "John", "Pass"), ("2.0", "Paul", None), ("2.1", "John", None), ("2.1", "Paul", "Hold"),
+        ("10", "Paul", None), ("9", "Paul", "Pass"), ("9.1", "Paul", None), ("abc", "Paul", None),
+        ("3", None, "Pass"), ("3.1", "Anmol", float("nan")), ("3.2", "Anmol", None), ("1.1", "Paul", None),
+        ("4", float("nan"), None), ("4.1", "Vaishnavi", "Other"),
+    ], columns=["Task ID", "Tester Name", "Test Result"])
+    index = TaskIndex(df)
+
+    assert index.testers == ["Anmol", "John", "Paul", "Vaishnavi"]
+    for tester in [*index.testers, "Nobody"]:
+        assert index.tester_plan(tester) == reference_plan(df, tester), tester
@@ -0,0 +1,191 @@
+import io
+import re
+import zipfile
+import random
+import openpyxl
+import pytest
+from PIL import Image
+from openpyxl.drawing.image import Image as OpenpyxlImage
+from openpyxl.styles import Font, PatternFill
+import workbook
+from workbook import LazyWorkbook, MEDIA_PREFIX, CONTENT_TYPES, DOC_REL_NS
+
+SHARED_STRINGS_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+
+
+def png(seed, size=(40, 30)):
+    rng = random.Random(seed)
+    bio = io.BytesIO()
+    Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3)).save(bio, format="PNG")
+    return bio.getvalue()
+
+
+def add_png(ws, data, anchor):
+    ws.add_image(OpenpyxlImage(io.BytesIO(data)), anchor)
+
+
+@pytest.fixture
+def styled_path(tmp_path):
+    """Sheet1, two task sheets with a screenshot each and a Summary, with strings and styles throughout"""
+    wb = openpyxl.Workbook()
+    main = wb.active
+    main.title = "Sheet1"
+    main.append(["Task ID", "Task Name", "Tester Name", "Test Result"])
+    main.append(["1", "Login", "Paul", "Pass"])
+    main.append(["2", "Logout", "John", None])
+    main["D2"].fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
+    for number in (1, 2):
+        ws = wb.create_sheet(f"Task ID {number}")
+        ws.append(["Task", f"Task {number}"])
+        ws["A1"].font = Font(bold=True)
+        add_png(ws, png(number), "A2")
+        ws.cell(row=17, column=1, value="Test Result").font = Font(italic=True)
+        ws.cell(row=17, column=2, value="Pass")
+    wb.create_sheet("Summary")["A1"] = "Total Tasks"
+    path = str(tmp_path / "styled.xlsx")
+    wb.save(path)
+    return path
+
+
+def with_shared_strings(path):
+    """Rewrite openpyxl's inline strings into xl/sharedStrings.xml, as Excel saves them"""
+    strings = []
+
+    def shared(match):
+        text = match.group(3)
+        if text not in strings:
+            strings.append(text)
+        return b'<c %st="s"%s><v>%d</v></c>' % (match.group(1), match.group(2), strings.index(text))
+
+    with zipfile.ZipFile(path) as zf:
+        members = {name: zf.read(name) for name in zf.namelist()}
+    for name in members:
+        if name.startswith("xl/worksheets/sheet"):
+            members[name] = re.sub(rb'<c ([^>]*?)t="inlineStr"([^>]*)><is><t[^>]*>(.*?)</t></is></c>', shared, members[name])
+    members["xl/sharedStrings.xml"] = (
+        b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">' % (
+            len(strings), len(strings)) + b"".join(b"<si><t>%s</t></si>" % text for text in strings) + b"</sst>"
+    )
+    members[CONTENT_TYPES] = members[CONTENT_TYPES].replace(
+        b"</Types>", f'<Override PartName="/xl/sharedStrings.xml" ContentType="{SHARED_STRINGS_CT}"/></Types>'.encode())
+    members["xl/_rels/workbook.xml.rels"] = members["xl/_rels/workbook.xml.rels"].replace(
+        b"</Relationships>", f'<Relationship Id="rIdStrings" Type="{DOC_REL_NS}/sharedStrings" '
+                             f'Target="/xl/sharedStrings.xml"/></Relationships>'.encode())
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def snapshot(path, sheet_name):
+    """Values and fonts/fills of every cell of a sheet"""
+    ws = openpyxl.load_workbook(path)[sheet_name]
+    return [
+        (cell.coordinate, cell.value, bool(cell.font.b), bool(cell.font.i), cell.fill.fgColor.rgb)
+        for row in ws.iter_rows() for cell in row
+    ]
+
+
+def image_count(path, sheet_name):
+    return len(openpyxl.load_workbook(path)[sheet_name]._images)
+
+
+def check_package(path):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return zf.namelist()
+
+
+def test_submit_into_existing_sheet(styled_path, tmp_path):
+    before = {name: snapshot(styled_path, name) for name in ("Sheet1", "Task ID 1", "Summary")}
+    wb = LazyWorkbook(styled_path)
+    wb.open_for_write(["Task ID 2", "Sheet1"])
+    wb["Task ID 2"].cell(row=19, column=1, value="Comment").font = Font(bold=True)
+    add_png(wb["Task ID 2"], png(3), "A20")
+    wb["Sheet1"]["D3"] = "Fail"
+    target = str(tmp_path / "out.xlsx")
+    wb.save(target)
+
+    check_package(target)
+    assert snapshot(target, "Task ID 1") == before["Task ID 1"]
+    assert snapshot(target, "Summary") == before["Summary"]
+    assert snapshot(target, "Sheet1") == [
+        cell if cell[0] != "D3" else ("D3", "Fail", *cell[2:]) for cell in before["Sheet1"]
+    ]
+    assert ("A19", "Comment", True, False, "00000000") in snapshot(target, "Task ID 2")
+    assert image_count(target, "Task ID 1") == 1
+    assert image_count(target, "Task ID 2") == 2
+
+
+def test_new_sheet(styled_path, tmp_path):
+    before = {name: snapshot(styled_path, name) for name in ("Sheet1", "Task ID 1", "Task ID 2", "Summary")}
+    wb = LazyWorkbook(styled_path)
+    ws = wb.create_sheet("Task ID 3")
+    ws["A1"] = "Task"
+    ws["B1"] = "Task 3"
+    ws["A1"].font = Font(bold=True)
+    add_png(ws, png(4), "A2")
+    target = str(tmp_path / "out.xlsx")
+    wb.save(target)
+
+    check_package(target)
+    assert openpyxl.load_workbook(target).sheetnames == ["Sheet1", "Task ID 1", "Task ID 2", "Summary", "Task ID 3"]
+    for name, cells in before.items():
+        assert snapshot(target, name) == cells
+    assert snapshot(target, "Task ID 3")[:2] == [("A1", "Task", True, False, "00000000"),
+                                                 ("B1", "Task 3", False, False, "00000000")]
+    assert [image_count(target, name) for name in ("Task ID 1", "Task ID 2", "Task ID 3")] == [1, 1, 1]
+
+
+def test_shared_strings(styled_path, tmp_path, monkeypatch):
+    before = {name: snapshot(styled_path, name) for name in ("Task ID 1", "Task ID 2", "Summary")}
+    with_shared_strings(styled_path)
+    with zipfile.ZipFile(styled_path) as zf:
+        assert b't="inlineStr"' not in zf.read("xl/worksheets/sheet2.xml")
+    for name, cells in before.items():
+        assert snapshot(styled_path, name) == cells
+    wb = LazyWorkbook(styled_path)
+    wb.open_for_write(["Sheet1"])
+    # New strings shift the shared string table of the rewritten sheet
+    wb["Sheet1"].insert_rows(1)
+    wb["Sheet1"]["A1"] = "A brand new string"
+    wb["Sheet1"]["E3"] = "Another new string"
+    partials = []
+    merge = workbook._merge_package
+    monkeypatch.setattr(workbook, "_merge_package",
+                        lambda src, partial, target: partials.append(partial) or merge(src, partial, target))
+    target = str(tmp_path / "out.xlsx")
+    wb.save(target)
+
+    # The merge drops the partial's string table; an openpyxl that writes one would corrupt the rewritten sheets
+    with zipfile.ZipFile(io.BytesIO(partials[0])) as zf:
+        assert "xl/sharedStrings.xml" not in zf.namelist()
+    check_package(target)
+    for name, cells in before.items():
+        assert snapshot(target, name) == cells
+    values = [[cell.value for cell in row] for row in openpyxl.load_workbook(target)["Sheet1"].iter_rows()]
+    assert values[:3] == [
+        ["A brand new string", None, None, None, None],
+        ["Task ID", "Task Name", "Tester Name", "Test Result", None],
+        ["1", "Login", "Paul", "Pass", "Another new string"],
+    ]
+
+
+def test_identical_images_share_one_media_part(styled_path, tmp_path):
+    wb = LazyWorkbook(styled_path)
+    wb.open_for_write(["Task ID 2"])
+    # The same screenshot as Task ID 1's, twice
+    add_png(wb["Task ID 2"], png(1), "A20")
+    add_png(wb["Task ID 2"], png(1), "A35")
+    target = str(tmp_path / "out.xlsx")
+    wb.save(target)
+
+    names = check_package(target)
+    media = [name for name in names if name.startswith(MEDIA_PREFIX)]
+    with zipfile.ZipFile(target) as zf:
+        assert len({zf.read(name) for name in media}) == len(media) == 2
+    assert image_count(target, "Task ID 1") == 1
+    assert image_count(target, "Task ID 2") == 3
+    target_wb = openpyxl.load_workbook(target)
+    assert target_wb["Task ID 2"]._images[1]._data() == target_wb["Task ID 1"]._images[0]._data() == png(1)
+    assert snapshot(target, "Task ID 1") == snapshot(styled_path, "Task ID 1")
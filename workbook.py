@@ -0,0 +1,511 @@
+import io
+import os
+import re
+import copy
+import shutil
+import struct
+import zlib
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+import openpyxl
+from perf import timed
+
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORKSHEET_REL = f"{DOC_REL_NS}/worksheet"
+STYLES_REL = f"{DOC_REL_NS}/styles"
+OFFICE_DOCUMENT_REL = f"{DOC_REL_NS}/officeDocument"
+DRAWING_REL = f"{DOC_REL_NS}/drawing"
+IMAGE_REL = f"{DOC_REL_NS}/image"
+XDR_NS = "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing"
+DRAWINGML_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+WORKSHEET_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+CONTENT_TYPES = "[Content_Types].xml"
+CORE_PROPS = "docProps/core.xml"
+CUSTOM_PROPS = "docProps/custom.xml"
+CUSTOM_PROPS_REL = f"{DOC_REL_NS}/custom-properties"
+ROOT_RELS = "_rels/.rels"
+MEDIA_PREFIX = "xl/media/"
+
+
+# --- OPC package helpers -----------------------------------------------------
+
+def _rels_path(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", f"{name}.rels")
+
+
+def _resolve(base_part, target):
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _read_rels(members, part):
+    """Return [(id, type, target part)] for the internal relationships of a part"""
+    data = members.get(_rels_path(part))
+    if data is None:
+        return []
+    rels = []
+    for rel in ET.fromstring(data).iter(f"{{{REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        rels.append((rel.get("Id"), rel.get("Type"), _resolve(part, rel.get("Target"))))
+    return rels
+
+
+def _reachable(members, roots):
+    seen = set()
+    stack = list(roots)
+    while stack:
+        part = stack.pop()
+        if part in seen:
+            continue
+        seen.add(part)
+        stack.extend(target for _, _, target in _read_rels(members, part))
+    return seen
+
+
+def _workbook_part(members):
+    for _, rel_type, target in _read_rels(members, ""):
+        if rel_type == OFFICE_DOCUMENT_REL:
+            return target
+    return "xl/workbook.xml"
+
+
+def _sheet_parts(members, workbook_part):
+    """Map sheet name -> (relationship id, worksheet part), in tab order"""
+    targets = {rid: target for rid, _, target in _read_rels(members, workbook_part)}
+    sheets = {}
+    root = ET.fromstring(members[workbook_part])
+    for sheet in root.iter(f"{{{MAIN_NS}}}sheet"):
+        rid = sheet.get(f"{{{DOC_REL_NS}}}id")
+        sheets[sheet.get("name")] = (rid, targets[rid])
+    return sheets
+
+
+def sheet_images(zf, sheet_name):
+    """[(1-based anchor row, media part)] of the pictures on one sheet of an open xlsx zip.
+
+    Only the workbook, relationship and drawing parts are read; the media
+    themselves are left for the caller to stream.
+    """
+    members = _LazyMembers(zf)
+    sheets = _sheet_parts(members, _workbook_part(members))
+    if sheet_name not in sheets:
+        return []
+    images = []
+    for _, rel_type, drawing in _read_rels(members, sheets[sheet_name][1]):
+        if rel_type != DRAWING_REL:
+            continue
+        media = {rid: target for rid, target_type, target in _read_rels(members, drawing) if target_type == IMAGE_REL}
+        for anchor in ET.fromstring(members[drawing]):
+            row = anchor.find(f"{{{XDR_NS}}}from/{{{XDR_NS}}}row")
+            blip = anchor.find(f".//{{{DRAWINGML_NS}}}blip")
+            target = None if blip is None else media.get(blip.get(f"{{{DOC_REL_NS}}}embed"))
+            if row is not None and target is not None:
+                images.append((int(row.text) + 1, target))
+    return images
+
+
+class _LazyMembers(dict):
+    """Zip members read on first access, so large untouched media are never inflated"""
+
+    def __init__(self, zf):
+        super().__init__()
+        self._zf = zf
+        self._names = set(zf.namelist())
+
+    def get(self, name, default=None):
+        return self[name] if name in self._names else default
+
+    def __missing__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        value = self._zf.read(name)
+        self[name] = value
+        return value
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def names(self):
+        return list(self._zf.namelist())
+
+
+def _drop_elements(xml, tag, predicate):
+    """Remove self-closing <tag .../> elements whose attribute text matches predicate"""
+    pattern = re.compile(rf"<(?:\w+:)?{tag}\s[^>]*?/>".encode())
+    return pattern.sub(lambda m: b"" if predicate(m.group(0)) else m.group(0), xml)
+
+
+def _attr(element_xml, name):
+    match = re.search(rf'\b{name}="([^"]*)"'.encode(), element_xml)
+    return match.group(1).decode() if match else None
+
+
+def _insert_before(xml, closing_tag, fragment):
+    index = xml.rindex(closing_tag.encode())
+    return xml[:index] + fragment.encode() + xml[index:]
+
+
+def _copy_raw(src, dst, info):
+    """Copy one member's compressed bytes between archives without inflating them"""
+    src.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, src.fp.read(zipfile.sizeFileHeader))
+    src.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], 1)
+    data = src.fp.read(info.compress_size)
+
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~0x08  # sizes are known, so no trailing data descriptor
+    new_info.header_offset = dst.fp.tell()
+    dst.fp.write(new_info.FileHeader())
+    dst.fp.write(data)
+    dst.filelist.append(new_info)
+    dst.NameToInfo[new_info.filename] = new_info
+    dst.start_dir = dst.fp.tell()
+    dst._didModify = True
+
+
+def _subset_package(src_path, keep_sheets):
+    """Build an in-memory xlsx holding only keep_sheets (and the parts they reference)"""
+    out = io.BytesIO()
+    with zipfile.ZipFile(src_path) as zf:
+        members = _LazyMembers(zf)
+        workbook_part = _workbook_part(members)
+        sheets = _sheet_parts(members, workbook_part)
+        kept = {sheets[name][1] for name in keep_sheets if name in sheets}
+        dropped_rids = {rid for name, (rid, _) in sheets.items() if name not in keep_sheets}
+        dropped = _reachable(members, [part for _, part in sheets.values() if part not in kept])
+        dropped -= _reachable(members, kept)
+        dropped_names = {f"/{part}" for part in dropped}
+
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+            for name in members.names():
+                owner = name.replace("/_rels/", "/")[:-5] if name.endswith(".rels") else name
+                if name in dropped or owner in dropped:
+                    continue
+                data = members[name]
+                if name == workbook_part:
+                    data = _drop_elements(data, "sheet", lambda el: _attr(el, r"\w+:id") in dropped_rids)
+                    # Defined names index sheets by position, which no longer holds here
+                    data = re.sub(rb"<definedNames>.*?</definedNames>", b"", data, flags=re.S)
+                elif name == _rels_path(workbook_part):
+                    data = _drop_elements(data, "Relationship", lambda el: _attr(el, "Id") in dropped_rids)
+                elif name == CONTENT_TYPES:
+                    data = _drop_elements(data, "Override", lambda el: _attr(el, "PartName") in dropped_names)
+                dst.writestr(name, data)
+    out.seek(0)
+    return out
+
+
+def _free_name(part, taken):
+    folder, name = posixpath.split(part)
+    match = re.match(r"^(.*?)(\d*)(\.[^.]+)$", name)
+    stem, _, ext = match.groups()
+    index = 1
+    while True:
+        candidate = posixpath.join(folder, f"{stem}{index}{ext}")
+        if candidate not in taken:
+            return candidate
+        index += 1
+
+
+def _merge_package(src_path, partial_bytes, target):
+    """Write src_path with the sheets of partial_bytes spliced in, copying the rest verbatim"""
+    partial = _LazyMembers(zipfile.ZipFile(io.BytesIO(partial_bytes)))
+    partial_workbook = _workbook_part(partial)
+    partial_sheets = _sheet_parts(partial, partial_workbook)
+    partial_types = ET.fromstring(partial[CONTENT_TYPES])
+    partial_overrides = {
+        el.get("PartName").lstrip("/"): el.get("ContentType")
+        for el in partial_types.iter(f"{{{CT_NS}}}Override")
+    }
+    partial_defaults = {
+        el.get("Extension").lower(): el.get("ContentType")
+        for el in partial_types.iter(f"{{{CT_NS}}}Default")
+    }
+
+    with zipfile.ZipFile(src_path) as src:
+        members = _LazyMembers(src)
+        workbook_part = _workbook_part(members)
+        sheets = _sheet_parts(members, workbook_part)
+        touched = [sheets[name][1] for name in partial_sheets if name in sheets]
+        untouched = [part for _, part in sheets.values() if part not in touched]
+
+        # Drawings, media and charts of the rewritten sheets are replaced wholesale
+        stale = _reachable(members, touched) - _reachable(members, untouched)
+        stale |= {_rels_path(part) for part in stale}
+        # Stale names are not reused: a new image may turn out to be one of them (see below)
+        taken = set(members.names()) | set(touched)
+        pending = {}
+        written = {}
+        media = {}
+        for info in src.infolist():
+            if info.filename.startswith(MEDIA_PREFIX):
+                media.setdefault((info.CRC, info.file_size), []).append(info.filename)
+
+        def existing_media(data):
+            """An identical media part already in the package (or written by this save)"""
+            for candidate in media.get((zlib.crc32(data), len(data)), []):
+                candidate_data = pending.get(candidate) or members[candidate]
+                if candidate_data == data:
+                    return candidate
+            return None
+        overrides = {}
+        defaults = {}
+
+        def copy_part(part, out_part=None):
+            if part in written:
+                return written[part]
+            if out_part is None and part.startswith(MEDIA_PREFIX):
+                # Screenshots are deduplicated by content: identical images share one part,
+                # and an unchanged image of a rewritten sheet keeps its bytes as they are
+                duplicate = existing_media(partial[part])
+                if duplicate is not None:
+                    stale.discard(duplicate)
+                    written[part] = duplicate
+                    return duplicate
+            out_part = out_part or _free_name(part, taken)
+            taken.add(out_part)
+            written[part] = out_part
+            if part.startswith(MEDIA_PREFIX):
+                data = partial[part]
+                media.setdefault((zlib.crc32(data), len(data)), []).append(out_part)
+            rels = partial.get(_rels_path(part))
+            if rels is not None:
+                def retarget(match):
+                    element = match.group(0)
+                    if _attr(element, "TargetMode") == "External":
+                        return element
+                    new_target = "/" + copy_part(_resolve(part, _attr(element, "Target")))
+                    return re.sub(rb'\bTarget="[^"]*"', f'Target="{new_target}"'.encode(), element)
+
+                pending[_rels_path(out_part)] = re.sub(rb"<Relationship\s[^>]*?/>", retarget, rels)
+            pending[out_part] = partial[part]
+            if part in partial_overrides:
+                overrides[out_part] = partial_overrides[part]
+            ext = posixpath.splitext(part)[1][1:].lower()
+            if ext in partial_defaults:
+                defaults[ext] = partial_defaults[ext]
+            return out_part
+
+        new_sheets = []
+        for name, (_, part) in partial_sheets.items():
+            if name in sheets:
+                copy_part(part, sheets[name][1])
+            else:
+                new_part = _free_name("xl/worksheets/sheet.xml", taken)
+                copy_part(part, new_part)
+                overrides[new_part] = WORKSHEET_CT
+                new_sheets.append((name, new_part))
+
+        # Only the styles part is carried over: openpyxl 3.1+ (pinned in requirements.txt) writes
+        # inline strings, so the rewritten sheets do not index into the original sharedStrings.xml
+        for _, rel_type, part in _read_rels(partial, partial_workbook):
+            if rel_type == STYLES_REL:
+                styles = [t for _, kind, t in _read_rels(members, workbook_part) if kind == STYLES_REL]
+                if styles:
+                    pending[styles[0]] = partial[part]
+        if CORE_PROPS in partial and CORE_PROPS in members:
+            pending[CORE_PROPS] = partial[CORE_PROPS]
+        if CUSTOM_PROPS in partial:
+            # Workbook custom properties (e.g. the per-sheet section index) live here
+            pending[CUSTOM_PROPS] = partial[CUSTOM_PROPS]
+            if CUSTOM_PROPS not in members:
+                overrides[CUSTOM_PROPS] = partial_overrides[CUSTOM_PROPS]
+                root_rels = members[ROOT_RELS]
+                rel_ids = [int(i) for i in re.findall(rb'\bId="rId(\d+)"', root_rels)]
+                pending[ROOT_RELS] = _insert_before(
+                    root_rels, "</Relationships>",
+                    f'<Relationship Type="{CUSTOM_PROPS_REL}" Target="/{CUSTOM_PROPS}" '
+                    f'Id="rId{max(rel_ids, default=0) + 1}" />'
+                )
+
+        if new_sheets:
+            pending[workbook_part], pending[_rels_path(workbook_part)] = _register_sheets(
+                members[workbook_part], members[_rels_path(workbook_part)], new_sheets
+            )
+        pending[CONTENT_TYPES] = _update_content_types(members[CONTENT_TYPES], stale, overrides, defaults)
+
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename in pending:
+                    dst.writestr(info.filename, pending.pop(info.filename))
+                elif info.filename not in stale:
+                    _copy_raw(src, dst, info)
+            for name, data in pending.items():
+                dst.writestr(name, data)
+
+
+def _register_sheets(workbook_xml, rels_xml, new_sheets):
+    sheet_ids = [int(i) for i in re.findall(rb'\bsheetId="(\d+)"', workbook_xml)]
+    rel_ids = [int(i) for i in re.findall(rb'\bId="rId(\d+)"', rels_xml)]
+    next_sheet_id = max(sheet_ids, default=0) + 1
+    next_rel_id = max(rel_ids, default=0) + 1
+    sheet_tags, rel_tags = [], []
+    for offset, (name, part) in enumerate(new_sheets):
+        rid = f"rId{next_rel_id + offset}"
+        escaped = name.replace("&", "&amp;").replace('"', "&quot;").replace("<", "&lt;")
+        sheet_tags.append(
+            f'<sheet xmlns:r="{DOC_REL_NS}" name="{escaped}" sheetId="{next_sheet_id + offset}" '
+            f'state="visible" r:id="{rid}" />'
+        )
+        rel_tags.append(f'<Relationship Type="{WORKSHEET_REL}" Target="/{part}" Id="{rid}" />')
+    workbook_xml = _insert_before(workbook_xml, "</sheets>", "".join(sheet_tags))
+    rels_xml = _insert_before(rels_xml, "</Relationships>", "".join(rel_tags))
+    return workbook_xml, rels_xml
+
+
+def _update_content_types(xml, stale, overrides, defaults):
+    removed = {f"/{part}" for part in stale} | {f"/{part}" for part in overrides}
+    xml = _drop_elements(xml, "Override", lambda el: _attr(el, "PartName") in removed)
+    known = {ext.lower() for ext in re.findall(r'\bExtension="([^"]*)"', xml.decode())}
+    fragment = "".join(
+        f'<Default Extension="{ext}" ContentType="{ctype}" />'
+        for ext, ctype in defaults.items() if ext not in known
+    )
+    fragment += "".join(
+        f'<Override PartName="/{part}" ContentType="{ctype}" />' for part, ctype in overrides.items()
+    )
+    return _insert_before(xml, "</Types>", fragment)
+
+
+# --- Exploded package layout ---------------------------------------------------
+
+PARTS_SUFFIX = ".parts"
+
+
+def explode_package(data):
+    """Split xlsx bytes into {member name: bytes}"""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {info.filename: zf.read(info) for info in zf.infolist() if not info.is_dir()}
+
+
+def pack_package(members, target):
+    """Zip {member name: bytes} back into an xlsx ([Content_Types].xml first, as Excel writes it)"""
+    order = sorted(members, key=lambda name: (name != CONTENT_TYPES, name))
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name in order:
+            zf.writestr(name, members[name])
+
+
+def ensure_packed(path):
+    """Rebuild path from its exploded `<path>.parts/` directory when only the latter exists"""
+    parts_dir = path + PARTS_SUFFIX
+    if os.path.exists(path) or not os.path.isdir(parts_dir):
+        return
+    members = {}
+    for folder, _, files in os.walk(parts_dir):
+        for name in files:
+            full_path = os.path.join(folder, name)
+            with open(full_path, "rb") as f:
+                members[os.path.relpath(full_path, parts_dir).replace(os.sep, "/")] = f.read()
+    tmp_path = f"{path}.tmp"
+    pack_package(members, tmp_path)
+    os.replace(tmp_path, path)
+
+
+# --- Workbook facade -----------------------------------------------------------
+
+class LazyWorkbook:
+    """Workbook facade that streams reads and only loads the sheets a submit writes to.
+
+    Sheet1/Summary reads go through openpyxl's read-only mode, which never
+    decodes the screenshots embedded in the "Task ID N" sheets. Writes load just
+    the requested sheets, and save() splices them back into the original file,
+    copying every other zip member byte-for-byte.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._sheetnames = None
+        self._wb = None
+
+    def _open_read_only(self):
+        return openpyxl.load_workbook(self.path, read_only=True)
+
+    @property
+    def sheetnames(self):
+        if self._sheetnames is None:
+            ro_wb = self._open_read_only()
+            self._sheetnames = ro_wb.sheetnames
+            ro_wb.close()
+        names = list(self._sheetnames)
+        if self._wb is not None:
+            names += [name for name in self._wb.sheetnames if name not in names]
+        return names
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheetnames
+
+    @timed("workbook.read_dataframe")
+    def read_dataframe(self, sheet_name="Sheet1"):
+        import pandas as pd
+        # pandas closes the workbook it is handed, so give it a throwaway read-only one
+        if self._wb is not None and sheet_name in self._wb.sheetnames:
+            source = self._wb
+        else:
+            source = self._open_read_only()
+        return pd.read_excel(source, sheet_name=sheet_name, engine="openpyxl")
+
+    def read_rows(self, sheet_name, **kwargs):
+        """Return the cell values of one sheet without loading it for writing"""
+        if self._wb is not None and sheet_name in self._wb.sheetnames:
+            return list(self._wb[sheet_name].iter_rows(values_only=True, **kwargs))
+        ro_wb = self._open_read_only()
+        try:
+            return list(ro_wb[sheet_name].iter_rows(values_only=True, **kwargs))
+        finally:
+            ro_wb.close()
+
+    def custom_properties(self):
+        """Custom document properties, read without loading any sheet for writing"""
+        if self._wb is not None:
+            return self._wb.custom_doc_props
+        ro_wb = self._open_read_only()
+        try:
+            return ro_wb.custom_doc_props
+        finally:
+            ro_wb.close()
+
+    @timed("workbook.open_for_write")
+    def open_for_write(self, sheet_names):
+        """Load only the named sheets (those that exist) into an editable workbook"""
+        if self._wb is not None:
+            missing = [name for name in sheet_names
+                       if name in self.sheetnames and name not in self._wb.sheetnames]
+            if missing:
+                raise ValueError(f"Sheets {missing} were not opened for writing")
+            return self._wb
+        existing = set(self.sheetnames)
+        keep = [name for name in sheet_names if name in existing]
+        self._wb = openpyxl.load_workbook(_subset_package(self.path, keep))
+        return self._wb
+
+    def __getitem__(self, sheet_name):
+        if self._wb is None:
+            self.open_for_write([sheet_name])
+        return self._wb[sheet_name]
+
+    def create_sheet(self, title):
+        if self._wb is None:
+            self.open_for_write([])
+        return self._wb.create_sheet(title)
+
+    @timed("workbook.save")
+    def save(self, target):
+        """Write the workbook to a path or file object, rewriting only the opened sheets"""
+        if self._wb is None:
+            if hasattr(target, "write"):
+                with open(self.path, "rb") as f:
+                    shutil.copyfileobj(f, target)
+            else:
+                shutil.copyfile(self.path, target)
+            return
+        partial = io.BytesIO()
+        self._wb.save(partial)
+        _merge_package(self.path, partial.getvalue(), target)